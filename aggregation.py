@@ -0,0 +1,189 @@
+"""Incrementally maintained per-date sums across departments.
+
+The GRA-Overall charts show the per-date sum of every department's frame.
+``DateAggregate`` builds that sum once with a single concat + groupby over
+all sources and then keeps it as a running total: when one source frame
+changes, only the rows that were added or removed are applied instead of
+concatenating and regrouping all departments again. Appending rows to the
+end of a source (the usual edit) is detected without hashing the frame.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class _Source:
+    """One source frame; its rows as arrays (ns dates, float64 values) are only built for diffs."""
+
+    __slots__ = ("fingerprint", "frame", "value_columns", "_arrays", "_keys")
+
+    def __init__(self, fingerprint, frame, value_columns):
+        self.fingerprint = fingerprint
+        self.frame = frame
+        self.value_columns = value_columns
+        self._arrays = None
+        self._keys = None
+
+    def rows(self, mask=None):
+        # (dates, values) of all rows, or of the rows selected by mask
+        if self._arrays is None:
+            self._arrays = (self.frame["Date"].to_numpy("datetime64[ns]"),
+                            np.column_stack([self.frame[col].to_numpy("float64") for col in self.value_columns]))
+        dates, values = self._arrays
+        return (dates, values) if mask is None else (dates[mask], values[mask])
+
+    def row_keys(self):
+        # Row identity for multiset diffs: (row content hash, occurrence number among equal rows)
+        if self._keys is None:
+            hashes = pd.Series(pd.util.hash_pandas_object(self.frame[["Date"] + self.value_columns],
+                                                          index=False).values)
+            occurrence = hashes.groupby(hashes).cumcount()
+            self._keys = pd.MultiIndex.from_arrays([hashes.values, occurrence.values])
+        return self._keys
+
+    def appended_to(self, previous):
+        # True if this source is the previous one with rows added at the end
+        (dates, values), (old_dates, old_values) = self.rows(), previous.rows()
+        n = len(old_dates)
+        return (len(dates) >= n and np.array_equal(dates[:n], old_dates)
+                and np.array_equal(values[:n], old_values, equal_nan=True))
+
+
+class DateAggregate:
+    """Running per-date sum of ``value_columns`` over named source frames.
+
+    Source frames must already be prepared (native datetime ``Date`` column).
+    ``update`` is a no-op when the source fingerprint is unchanged; otherwise
+    only the changed rows are folded into the totals. Pass all sources to
+    ``update_many`` so the first build is one groupby instead of one per source.
+    """
+
+    def __init__(self, value_columns):
+        self.value_columns = list(value_columns)
+        self._sources = {}
+        # Sorted unique dates and, per date, the column sums plus a trailing row count
+        self._dates = np.array([], dtype="datetime64[ns]")
+        self._values = np.zeros((0, len(self.value_columns) + 1))
+        self._dtypes = {}
+        self._frame = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        # Content key of the aggregate: the fingerprints of all its sources
+        return tuple(sorted((name, source.fingerprint) for name, source in self._sources.items()))
+
+    def update(self, source, fingerprint, load):
+        # load() returns the prepared source frame; it is only called when the fingerprint changed
+        self.update_many([(source, fingerprint, load)])
+
+    def update_many(self, sources):
+        # sources: iterable of (name, fingerprint, load); all changes are applied as one delta
+        with self._lock:
+            fresh, added, removed = [], [], []
+            for name, fingerprint, load in sources:
+                previous = self._sources.get(name)
+                if previous is not None and previous.fingerprint == fingerprint:
+                    continue
+                df = load()
+                if not self._dtypes:
+                    self._dtypes = {col: df[col].dtype for col in ["Date"] + self.value_columns}
+                current = _Source(fingerprint, df, self.value_columns)
+                if previous is None:
+                    fresh.append(df)
+                elif current.appended_to(previous):
+                    added.append(current.rows(slice(len(previous.frame), None)))
+                else:
+                    keys = current.row_keys()
+                    old_keys = previous.row_keys()
+                    added.append(current.rows(~keys.isin(old_keys)))
+                    removed.append(previous.rows(~old_keys.isin(keys)))
+                self._sources[name] = current
+            if fresh:
+                self._merge(*self._grouped(fresh))
+            self._apply(added, removed)
+
+    def remove(self, source):
+        with self._lock:
+            previous = self._sources.pop(source, None)
+            if previous is not None:
+                self._apply([], [previous.rows()])
+
+    def prune(self, keep):
+        # Drops every source whose name is not in keep (e.g. departments removed from the registry)
+        keep = set(keep)
+        with self._lock:
+            gone = [self._sources.pop(name) for name in list(self._sources) if name not in keep]
+            self._apply([], [source.rows() for source in gone])
+
+    def _grouped(self, frames):
+        # (sorted unique dates, per-date sums + row counts) of new source frames: one concat + groupby
+        rows = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        grouped = rows.groupby("Date", sort=True)
+        sums = grouped[self.value_columns].sum()
+        return (sums.index.to_numpy("datetime64[ns]"),
+                np.column_stack([sums.to_numpy("float64"), grouped.size().to_numpy("float64")]))
+
+    def _delta(self, added, removed):
+        # Same as _grouped for the rows added minus the rows removed, given as (dates, values) pairs
+        parts = [(dates, values, 1.0) for dates, values in added if len(dates)]
+        parts += [(dates, values, -1.0) for dates, values in removed if len(dates)]
+        if not parts:
+            return None
+        dates = np.concatenate([dates for dates, _, _ in parts])
+        values = np.concatenate([np.column_stack([np.nan_to_num(values) * sign, np.full(len(values), sign)])
+                                 for _, values, sign in parts])
+        # Like groupby().sum(): NaN values count as 0 and rows without a date are left out
+        dated = ~np.isnat(dates)
+        if not dated.all():
+            dates, values = dates[dated], values[dated]
+            if not len(dates):
+                return None
+        unique, inverse = np.unique(dates, return_inverse=True)
+        sums = np.column_stack([np.bincount(inverse, weights=values[:, i], minlength=len(unique))
+                                for i in range(values.shape[1])])
+        return unique, sums
+
+    def _apply(self, added, removed):
+        delta = self._delta(added, removed)
+        if delta is not None:
+            self._merge(*delta)
+            if any(len(dates) for dates, _ in removed):
+                # Dates whose last row was removed disappear from the aggregate
+                keep = self._values[:, -1] > 0
+                if not keep.all():
+                    self._dates, self._values = self._dates[keep], self._values[keep]
+
+    def _merge(self, dates, values):
+        # Adds per-date sums (dates sorted and unique) into the totals
+        if not len(self._dates):
+            self._dates, self._values = dates, values
+        else:
+            pos = np.searchsorted(self._dates, dates)
+            found = pos < len(self._dates)
+            found[found] = self._dates[pos[found]] == dates[found]
+            self._values[pos[found]] += values[found]
+            if not found.all():
+                new = ~found
+                merged_dates = np.concatenate([self._dates, dates[new]])
+                merged_values = np.concatenate([self._values, values[new]])
+                if dates[new][0] < self._dates[-1]:
+                    order = np.argsort(merged_dates, kind="stable")
+                    merged_dates, merged_values = merged_dates[order], merged_values[order]
+                self._dates, self._values = merged_dates, merged_values
+        self._frame = None
+
+    def frame(self):
+        # Aggregate as a Date-sorted frame, shaped like groupby("Date", as_index=False).sum()
+        with self._lock:
+            if self._frame is None:
+                columns = {"Date": self._dates.astype(self._dtypes.get("Date", self._dates.dtype))}
+                for i, col in enumerate(self.value_columns):
+                    values = self._values[:, i]
+                    dtype = self._dtypes.get(col, values.dtype)
+                    if pd.api.types.is_integer_dtype(dtype):
+                        values = values.round()
+                    columns[col] = values.astype(dtype)
+                self._frame = pd.DataFrame(columns)
+            return self._frame
@@ -0,0 +1,238 @@
+"""Reproducible benchmarks of the dashboard's render path.
+
+Seeded generators build synthetic CFD/BDC/BUC/EAC datasets of a given size,
+and each benchmark case times one stage of what a rerun does, headlessly and
+with cold caches: date parsing, the Overall aggregation (full build and a
+one-department append), figure building, Plotly JSON serialization, the
+KPI history and the completion forecasts. ``rows`` is the total row count of
+one chart type across all departments, so a (1_000_000, 500) case has 2,000
+rows per department.
+
+Results are saved as JSON (with the git revision and library versions) and
+can be compared against an earlier run::
+
+    python benchmark.py --label before
+    python benchmark.py --label after --compare benchmark_results/before.json
+    python benchmark.py --preset full --label release-1.4
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from aggregation import DateAggregate
+from charts import (DEFAULT_OPTIONS, OVERALL_SCOPE_COLOR, build_bdc_figure, build_buc_figure,
+                    build_cfd_figure, build_eac_figure)
+from forecast import MC_TRIALS, forecast_table
+from metrics import FLOW_COLUMNS, KPIHistory, kpi_history
+from pipeline import DATE_FORMAT, clear_caches, parse_dates, prepare_chart_frame
+
+RESULTS_DIR = Path(__file__).with_name("benchmark_results")
+
+PRESETS = {
+    "quick": {"rows": [1_000, 100_000], "departments": [3, 50]},
+    "full": {"rows": [10, 1_000, 100_000, 1_000_000, 10_000_000], "departments": [3, 50, 500]},
+}
+
+
+# -------------------------------
+# Seeded Data Generators
+# -------------------------------
+def synthetic_dates(rows, start="2020-01-01"):
+    # Daily dates while they fit in pandas' timestamp range, minute steps for very long series
+    return pd.date_range(start=start, periods=rows, freq="D" if rows <= 50_000 else "min")
+
+
+def synthetic_frame(kind, rows, seed=0):
+    # One department's frame of the given chart type, identical for identical (kind, rows, seed)
+    rng = np.random.default_rng(seed)
+    dates = synthetic_dates(rows)
+    if kind == "CFD":
+        return pd.DataFrame({"Date": dates,
+                             "Backlog": rng.integers(50, 100, rows),
+                             "In Progress": rng.integers(20, 70, rows),
+                             "Done": np.cumsum(rng.integers(0, 5, rows))})
+    if kind == "BDC":
+        ideal = np.linspace(100, 0, rows)
+        return pd.DataFrame({"Date": dates, "Ideal": ideal, "Actual": ideal + rng.normal(0, 5, rows)})
+    if kind == "BUC":
+        return pd.DataFrame({"Date": dates,
+                             "Total Scope": np.linspace(100, 130, rows),
+                             "Completed": np.linspace(0, 100, rows) + rng.normal(0, 5, rows)})
+    if kind == "EAC":
+        actual = np.linspace(0, 80000, rows) + rng.normal(0, 2000, rows)
+        return pd.DataFrame({"Date": dates, "Actual Cost": actual,
+                             "Forecast Cost": actual[-1] + np.linspace(0, 20000, rows)})
+    raise ValueError(f"Unknown chart type {kind!r}")
+
+
+def synthetic_project(rows, n_departments, seed=0):
+    # {kind: {dept_key: frame}} for CFD/BDC/BUC plus a global EAC and SPM frame
+    per_dept = max(1, rows // n_departments)
+    project = {kind: {f"D{i:03d}": synthetic_frame(kind, per_dept, seed=seed * 1_000_003 + i * 3 + k)
+                      for i in range(n_departments)}
+               for k, kind in enumerate(FLOW_COLUMNS)}
+    project["EAC"] = synthetic_frame("EAC", max(1, rows), seed=seed + 7)
+    project["SPM"] = pd.DataFrame({"Planned": [100.0], "Earned": [75.0]})
+    return project
+
+
+# -------------------------------
+# Timing
+# -------------------------------
+def _timed(setup, func, repeat):
+    # (min, median) seconds of func(setup()) over `repeat` runs, setup and caches excluded
+    times = []
+    result = None
+    for _ in range(repeat):
+        clear_caches()
+        arg = setup()
+        started = time.perf_counter()
+        result = func(arg)
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times), result
+
+
+def _build_aggregate(kind, frames):
+    aggregate = DateAggregate(FLOW_COLUMNS[kind])
+    aggregate.update_many((name, name, lambda df=df: prepare_chart_frame(df)) for name, df in frames.items())
+    return aggregate
+
+
+def _overall_figure(kind, frame):
+    if kind == "CFD":
+        return build_cfd_figure(frame, "Benchmark CFD", DEFAULT_OPTIONS)
+    if kind == "BDC":
+        return build_bdc_figure(frame, "Benchmark BDC", DEFAULT_OPTIONS)
+    return build_buc_figure(frame, "Benchmark BUC", OVERALL_SCOPE_COLOR, DEFAULT_OPTIONS)
+
+
+def benchmark_cases(project, rows, repeat):
+    # Yields (case, min_s, median_s, extra) for one generated project
+    first_dept = next(iter(project["CFD"]))
+    date_strings = pd.Series(project["CFD"][first_dept]["Date"].dt.strftime(DATE_FORMAT))
+    date_strings = pd.concat([date_strings] * max(1, rows // max(1, len(date_strings))), ignore_index=True)
+    yield ("parse_dates",) + _timed(lambda: date_strings, parse_dates, repeat)[:2] + ({"values": len(date_strings)},)
+
+    for kind in FLOW_COLUMNS:
+        frames = project[kind]
+        best, median, aggregate = _timed(lambda: frames, lambda f: _build_aggregate(kind, f), repeat)
+        yield f"aggregate_full/{kind}", best, median, {}
+
+        # Appending one row to one department folds in just that row
+        appended = dict(frames)
+        df = appended[first_dept]
+        appended[first_dept] = pd.concat([df, df.iloc[[-1]].assign(Date=df["Date"].iloc[-1] + pd.Timedelta(days=1))],
+                                         ignore_index=True)
+        best, median, _ = _timed(lambda: _build_aggregate(kind, frames),
+                                 lambda agg: agg.update(first_dept, "appended",
+                                                        lambda: prepare_chart_frame(appended[first_dept])),
+                                 repeat)
+        yield f"aggregate_append/{kind}", best, median, {}
+
+        overall = aggregate.frame()
+        best, median, fig = _timed(lambda: overall, lambda frame: _overall_figure(kind, frame), repeat)
+        yield f"figure_build/{kind}", best, median, {}
+        best, median, payload = _timed(lambda: fig, lambda f: f.to_json(), repeat)
+        yield f"serialize/{kind}", best, median, {"bytes": len(payload.encode())}
+
+    eac = prepare_chart_frame(project["EAC"])
+    best, median, fig = _timed(lambda: eac, lambda frame: build_eac_figure(frame, "Benchmark EAC", DEFAULT_OPTIONS),
+                               repeat)
+    yield "figure_build/EAC", best, median, {}
+    best, median, payload = _timed(lambda: fig, lambda f: f.to_json(), repeat)
+    yield "serialize/EAC", best, median, {"bytes": len(payload.encode())}
+
+    best, median, history = _timed(lambda: eac, lambda frame: kpi_history(project["SPM"], frame), repeat)
+    yield "kpi_history/full", best, median, {"dates": len(history)}
+
+    def extend(history):
+        history.update("appended", lambda: (project["SPM"], pd.concat(
+            [eac, eac.iloc[[-1]].assign(Date=eac["Date"].iloc[-1] + pd.Timedelta(days=1))], ignore_index=True)))
+
+    def seeded_history():
+        history = KPIHistory()
+        history.update("base", lambda: (project["SPM"], eac))
+        return history
+    best, median, _ = _timed(seeded_history, extend, repeat)
+    yield "kpi_history/append", best, median, {}
+
+    # Completion forecasts for every department at once (trend fits plus Monte Carlo trials)
+    prepared = {kind: {name: prepare_chart_frame(df) for name, df in project[kind].items()} for kind in FLOW_COLUMNS}
+    best, median, _ = _timed(lambda: prepared, lambda p: forecast_table(p["CFD"], p["BDC"], p["BUC"]), repeat)
+    yield "forecast/all_departments", best, median, {"trials": MC_TRIALS, "per_department_s": median / len(prepared["CFD"])}
+
+
+def run_benchmarks(rows_list, departments_list, repeat=3, seed=0, log=print):
+    results = []
+    for rows in rows_list:
+        for n_departments in departments_list:
+            project = synthetic_project(rows, n_departments, seed)
+            for case, best, median, extra in benchmark_cases(project, rows, repeat):
+                result = {"case": case, "rows": rows, "departments": n_departments,
+                          "min_s": best, "median_s": median, **extra}
+                results.append(result)
+                log(f"{case:<28} rows={rows:<10} depts={n_departments:<4} "
+                    f"min={best * 1000:10.2f} ms  median={median * 1000:10.2f} ms")
+    return results
+
+
+def environment(label):
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {"label": label, "git_revision": revision, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "plotly": plotly.__version__, "machine": platform.machine()}
+
+
+def compare(results, baseline):
+    # Rows of (case, rows, departments, baseline median, new median, ratio) for cases in both runs
+    before = {(r["case"], r["rows"], r["departments"]): r["median_s"] for r in baseline["results"]}
+    rows = []
+    for r in results:
+        key = (r["case"], r["rows"], r["departments"])
+        if key in before:
+            rows.append(key + (before[key], r["median_s"], r["median_s"] / before[key] if before[key] else np.nan))
+    return pd.DataFrame(rows, columns=["case", "rows", "departments", "baseline_s", "median_s", "ratio"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the dashboard render path on seeded synthetic data.")
+    parser.add_argument("--preset", choices=PRESETS, default="quick")
+    parser.add_argument("--rows", type=int, nargs="+", help="total rows per chart type (overrides the preset)")
+    parser.add_argument("--departments", type=int, nargs="+", help="department counts (overrides the preset)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=time.strftime("%Y%m%d-%H%M%S"), help="name of the results file")
+    parser.add_argument("--output-dir", default=str(RESULTS_DIR))
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    results = run_benchmarks(args.rows or preset["rows"], args.departments or preset["departments"],
+                             repeat=args.repeat, seed=args.seed)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output = output_dir / f"{args.label}.json"
+    output.write_text(json.dumps({"environment": environment(args.label), "seed": args.seed,
+                                  "repeat": args.repeat, "results": results}, indent=2))
+    print(f"Saved {len(results)} results to {output}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(compare(results, baseline).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
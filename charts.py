@@ -0,0 +1,264 @@
+"""Plotly figure builders for the dashboard charts and gauges.
+
+Builders take already prepared frames (native datetime ``Date`` column, sorted
+by date) and return new ``go.Figure`` objects without touching Streamlit, so
+they can be cached and reused across reruns and sessions.
+
+``ChartOptions`` controls how much data a chart ships to the browser:
+``x_range`` limits it to a (start, end) date window, ``max_points`` caps the
+points per trace (see ``downsample``) and traces longer than
+``webgl_threshold`` are drawn with ``go.Scattergl``. ``granularity`` (day,
+week or month) plots the last value of each period instead of every row; the
+default ``None`` plots the raw rows. Dates are sent as epoch
+milliseconds and values as numpy arrays, which Plotly serializes as compact
+base64 typed arrays instead of JSON lists of strings.
+
+The burndown, burnup and EAC builders take an optional ``projection``
+(``forecast.Projection``) that is drawn as a dotted trend forecast from the
+last record to the projected completion date.
+"""
+from collections import namedtuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+from downsample import DEFAULT_MAX_POINTS, lttb_xy, minmax_frame, rollup_frame, slice_dates
+
+CFD_STAGES = ["Backlog", "In Progress", "Done"]
+CFD_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c"]
+
+# Scope line color of the GRA-Overall burnup chart (departments use their own color)
+OVERALL_SCOPE_COLOR = "purple"
+
+# Chart titles are "<department or overall title> – <chart name>" in the app and in reports
+CHART_NAMES = {
+    "CFD": "Cumulative Flow Diagram (CFD)",
+    "BDC": "Burndown Chart (BDC)",
+    "BUC": "Burnup Chart (BUC)",
+    "EAC": "Estimate at Completion (EAC)",
+}
+
+# Above this many points per trace, SVG rendering gets sluggish in the browser
+WEBGL_THRESHOLD = 5000
+
+ChartOptions = namedtuple("ChartOptions", ["max_points", "x_range", "webgl_threshold", "granularity"],
+                          defaults=[DEFAULT_MAX_POINTS, None, WEBGL_THRESHOLD, None])
+DEFAULT_OPTIONS = ChartOptions()
+
+
+def _date_axis_layout(fig, title, yaxis_title):
+    # Explicit date axis, since x values are sent as epoch milliseconds
+    fig.update_layout(title=title,
+                      xaxis_title="Date", yaxis_title=yaxis_title,
+                      xaxis=dict(type="date", tickformat="%d.%m.%Y"))
+    return fig
+
+
+def _epoch_ms(dates):
+    # datetime64 values as float64 milliseconds since epoch (NaT becomes NaN)
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    ms = dates.astype(np.int64) / 1e6
+    ms[np.isnat(dates)] = np.nan
+    return ms
+
+
+def _visible(df, options):
+    # Rows a chart shows: the period-end rows at the chosen granularity, inside the zoom window
+    return slice_dates(rollup_frame(df, options.granularity), options.x_range)
+
+
+def _hover_date(options):
+    return '%{x|%m.%Y}' if options.granularity == "month" else '%{x|%d.%m.%Y}'
+
+
+def _numeric(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _scatter_type(n_points, options):
+    if options.webgl_threshold is not None and n_points > options.webgl_threshold:
+        return go.Scattergl
+    return go.Scatter
+
+
+def _line_trace(df, column, options, **trace_kwargs):
+    # LTTB-downsampled line trace, switching to WebGL for long series
+    x, y = lttb_xy(df, column, options.max_points)
+    return _scatter_type(len(x), options)(x=_epoch_ms(x), y=_numeric(y), **trace_kwargs)
+
+
+def _half_transparent(hex_color):
+    # Plotly's default stackgroup fill: the line color at 50% opacity
+    r, g, b = (int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, 0.5)"
+
+
+def chart_title(owner, kind):
+    return f"{owner} – {CHART_NAMES[kind]}"
+
+
+# -------------------------------
+# Chart Builders
+# -------------------------------
+def build_cfd_figure(df_cfd, title, options=DEFAULT_OPTIONS):
+    df_cfd = minmax_frame(_visible(df_cfd, options), CFD_STAGES, options.max_points)
+    x = _epoch_ms(df_cfd["Date"])
+    fig = go.Figure()
+    if _scatter_type(len(df_cfd), options) is go.Scatter:
+        for stage, trace_color in zip(CFD_STAGES, CFD_COLORS):
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=_numeric(df_cfd[stage]),
+                mode="lines",
+                name=stage,
+                stackgroup="one",
+                line=dict(color=trace_color, width=2, shape="linear"),
+                hovertemplate=_hover_date(options) + '<br>' + stage + ': %{y}<extra></extra>'
+            ))
+    else:
+        # Scattergl has no stackgroup: stack explicitly and fill between consecutive traces,
+        # showing each stage's own count on hover
+        stacked = np.zeros(len(df_cfd))
+        for i, (stage, trace_color) in enumerate(zip(CFD_STAGES, CFD_COLORS)):
+            values = _numeric(df_cfd[stage])
+            stacked = stacked + np.nan_to_num(values)
+            fig.add_trace(go.Scattergl(
+                x=x,
+                y=stacked,
+                customdata=values,
+                mode="lines",
+                name=stage,
+                fill="tozeroy" if i == 0 else "tonexty",
+                fillcolor=_half_transparent(trace_color),
+                line=dict(color=trace_color, width=2, shape="linear"),
+                hovertemplate=_hover_date(options) + '<br>' + stage + ': %{customdata}<extra></extra>'
+            ))
+    return _date_axis_layout(fig, title, "Count")
+
+
+def _add_projection(fig, projection, name, color):
+    # Dotted forecast line from the last record to the projected completion
+    if projection is not None:
+        fig.add_trace(go.Scatter(
+            x=_epoch_ms(np.array(projection.dates, dtype="datetime64[ns]")), y=np.array(projection.values),
+            mode='lines+markers', name=name,
+            line=dict(dash='dot', color=color),
+            hovertemplate='%{x|%d.%m.%Y}<br>' + name + ': %{y:.0f}<extra></extra>'
+        ))
+    return fig
+
+
+def build_bdc_figure(df_bdc, title, options=DEFAULT_OPTIONS, projection=None):
+    df_bdc = _visible(df_bdc, options)
+    fig = go.Figure()
+    fig.add_trace(_line_trace(
+        df_bdc, "Ideal", options,
+        mode='lines', name='Ideal Burndown',
+        line=dict(dash='dash', color='green'),
+        hovertemplate=_hover_date(options) + '<br>Ideal: %{y}<extra></extra>'
+    ))
+    fig.add_trace(_line_trace(
+        df_bdc, "Actual", options,
+        mode='lines+markers', name='Actual Burndown',
+        line=dict(color='red'),
+        hovertemplate=_hover_date(options) + '<br>Actual: %{y}<extra></extra>'
+    ))
+    _add_projection(fig, projection, 'Trend Forecast', 'red')
+    return _date_axis_layout(fig, title, "Work Remaining (%)")
+
+
+def build_buc_figure(df_buc, title, scope_color, options=DEFAULT_OPTIONS, projection=None):
+    df_buc = _visible(df_buc, options)
+    fig = go.Figure()
+    fig.add_trace(_line_trace(
+        df_buc, "Total Scope", options,
+        mode='lines', name='Total Scope',
+        line=dict(color=scope_color),
+        hovertemplate=_hover_date(options) + '<br>Total Scope: %{y}<extra></extra>'
+    ))
+    fig.add_trace(_line_trace(
+        df_buc, "Completed", options,
+        mode='lines+markers', name='Completed',
+        line=dict(color='orange'),
+        hovertemplate=_hover_date(options) + '<br>Completed: %{y}<extra></extra>'
+    ))
+    _add_projection(fig, projection, 'Trend Forecast', 'orange')
+    return _date_axis_layout(fig, title, "Work Units")
+
+
+def build_eac_figure(df_eac, title, options=DEFAULT_OPTIONS, projection=None):
+    df_eac = _visible(df_eac, options)
+    fig = go.Figure()
+    fig.add_trace(_line_trace(
+        df_eac, "Actual Cost", options,
+        mode='lines+markers', name='Actual Cost',
+        line=dict(color='brown'),
+        hovertemplate=_hover_date(options) + '<br>Actual Cost: %{y}<extra></extra>'
+    ))
+    fig.add_trace(_line_trace(
+        df_eac, "Forecast Cost", options,
+        mode='lines+markers', name='Forecast Cost',
+        line=dict(dash='dash', color='gray'),
+        hovertemplate=_hover_date(options) + '<br>Forecast Cost: %{y}<extra></extra>'
+    ))
+    _add_projection(fig, projection, 'Cost Trend Forecast', 'brown')
+    return _date_axis_layout(fig, title, "Cost (€)")
+
+
+def build_kpi_trend_figure(df_history, kpi, reference, options=DEFAULT_OPTIONS):
+    # Compact line chart of one KPI over time, with its reference value as a dashed line
+    df_history = _visible(df_history, options)
+    fig = go.Figure(_line_trace(
+        df_history, kpi, options,
+        mode='lines', name=kpi,
+        line=dict(color='darkblue'),
+        hovertemplate=_hover_date(options) + '<br>' + kpi + ': %{y}<extra></extra>'
+    ))
+    fig.add_hline(y=reference, line=dict(color='black', dash='dash', width=1))
+    fig.update_layout(title=f"{kpi} Trend", height=220, showlegend=False,
+                      margin=dict(l=10, r=10, t=40, b=10),
+                      xaxis=dict(type="date", tickformat="%d.%m.%Y"))
+    return fig
+
+
+# -------------------------------
+# Gauges
+# -------------------------------
+# Axis range and colored steps per gauge; "delta_position" only where the original layout set it
+GAUGE_SPECS = {
+    "SPM": {"axis_range": (0, 100),
+            "steps": (((0, 50), "red"), ((50, 80), "yellow"), ((80, 100), "green"))},
+    "SV": {"axis_range": (-50, 50),
+           "steps": (((-50, 0), "red"), ((0, 50), "green")),
+           "delta_position": "bottom"},
+    "CCPM": {"axis_range": (0, 150),
+             "steps": (((0, 50), "red"), ((50, 75), "yellow"), ((75, 150), "green"))},
+    "CV": {"axis_range": (-50, 50),
+           "steps": (((-50, 0), "red"), ((0, 50), "green")),
+           "delta_position": "bottom"},
+    "North Star KPI": {"axis_range": (0, 100),
+                       "steps": (((0, 60), "red"), ((60, 80), "yellow"), ((80, 100), "green"))},
+}
+
+
+def build_gauge_figure(title, value, reference):
+    spec = GAUGE_SPECS[title]
+    delta = {'reference': reference}
+    if "delta_position" in spec:
+        delta['position'] = spec["delta_position"]
+    return go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=value,
+        delta=delta,
+        title={'text': title},
+        gauge={
+            'axis': {'range': list(spec["axis_range"])},
+            'bar': {'color': "darkblue"},
+            'steps': [{'range': list(rng), 'color': color} for rng, color in spec["steps"]],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': reference
+            }
+        }
+    ))
@@ -1,9 +1,24 @@
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
-import numpy as np
 import io
+import os
+import time
+from collections import deque
+
+import forecast
+import metrics
+import profiling
+from demo_data import get_demo_data
+from departments import load_departments
+from store import GLOBAL_PARTITION, get_store
+from shared import get_shared_datasets
+from schema import DEPARTMENT_KINDS, compact_frame
+from downsample import DEFAULT_MAX_POINTS, GRANULARITIES, granularity_label
+from charts import (OVERALL_SCOPE_COLOR, WEBGL_THRESHOLD, ChartOptions, build_cfd_figure, build_bdc_figure, build_buc_figure,
+                    build_eac_figure, build_gauge_figure, build_kpi_trend_figure, chart_title)
+from pipeline import (DATE_FORMAT, prepare_chart_frame,
+                      prepared_cache, rollup_cache, figure_cache, forecast_cache, cached_figure, chart_figure,
+                      aggregate_chart_figure, rolled_up_frame)
 
 # -------------------------------
 # Page Configuration
@@ -23,71 +38,50 @@ def get_data_editor():
 
 data_editor = get_data_editor()
 
-def convert_date(date_series):
-    # Expects date strings in DD.MM.YYYY format and converts them to datetime
-    return pd.to_datetime(date_series, format='%d.%m.%Y', dayfirst=True)
-
-# -------------------------------
-# Default Data for Charts
-# -------------------------------
-def default_cfd():
-    dates = pd.date_range(start="2025-01-02", periods=20).strftime('%d.%m.%Y')
-    return pd.DataFrame({
-        "Date": dates,
-        "Backlog": np.random.randint(50, 100, size=20),
-        "In Progress": np.random.randint(20, 70, size=20),
-        "Done": np.random.randint(10, 50, size=20)
-    })
-
-def default_bdc():
-    dates = pd.date_range(start="2025-02-01", periods=15).strftime('%d.%m.%Y')
-    ideal = np.linspace(100, 0, 15)
-    actual = ideal + np.random.normal(0, 5, 15)
-    return pd.DataFrame({
-        "Date": dates,
-        "Ideal": ideal,
-        "Actual": actual
-    })
-
-def default_buc():
-    dates = pd.date_range(start="2025-03-01", periods=15).strftime('%d.%m.%Y')
-    total_scope = np.linspace(100, 130, 15)
-    completed = np.linspace(0, 100, 15) + np.random.normal(0, 5, 15)
-    return pd.DataFrame({
-        "Date": dates,
-        "Total Scope": total_scope,
-        "Completed": completed
-    })
-
-def default_eac():
-    dates = pd.date_range(start="2025-04-01", periods=15).strftime('%d.%m.%Y')
-    actual_costs = np.linspace(0, 80000, 15) + np.random.normal(0, 2000, 15)
-    forecast = actual_costs[-1] + np.linspace(0, 20000, 15)
-    return pd.DataFrame({
-        "Date": dates,
-        "Actual Cost": actual_costs,
-        "Forecast Cost": forecast
-    })
-
-def default_spm():
-    # For SPM: Planned and Earned values; for example, if planned = 100 and earned = 75.
-    return pd.DataFrame({"Planned": [100], "Earned": [75]})
-
 # -------------------------------
 # Initialize Session State
 # -------------------------------
-for dept in ["Gov", "Risk", "Audit"]:
-    if f"{dept}_CFD" not in st.session_state:
-        st.session_state[f"{dept}_CFD"] = default_cfd()
-    if f"{dept}_BDC" not in st.session_state:
-        st.session_state[f"{dept}_BDC"] = default_bdc()
-    if f"{dept}_BUC" not in st.session_state:
-        st.session_state[f"{dept}_BUC"] = default_buc()
-
-if "EAC" not in st.session_state:
-    st.session_state["EAC"] = default_eac()
-if "SPM" not in st.session_state:
-    st.session_state["SPM"] = default_spm()
+departments = load_departments()
+store = get_store()
+
+# Seeded demo data per partition, read from the precomputed demo_data.parquet when present
+DEFAULT_FRAMES = get_demo_data().defaults()
+
+def frame_state_key(kind, partition=GLOBAL_PARTITION):
+    return kind if partition == GLOBAL_PARTITION else f"{partition}_{kind}"
+
+# Frames, the Overall aggregates and the KPI history exist once per server process and are shared by
+# all sessions (demo data included); sessions only remember which dataset versions they have seen
+datasets = get_shared_datasets(store, DEFAULT_FRAMES)
+# Optional feeds from DASHBOARD_SOURCES, refreshed in a background thread; reruns never wait for them
+refresher = None
+if os.environ.get("DASHBOARD_SOURCES"):
+    # Imported only when configured: the refresher pulls in asyncio, sqlite3 and the ingest readers
+    from sources import get_refresher
+    refresher = get_refresher(datasets, departments.keys())
+
+def drop_editor_state(state_key):
+    # Forgets staged edits and the editor widget state for one dataset
+    st.session_state.setdefault("edit_buffer", {}).pop(state_key, None)
+    st.session_state.pop(f"{state_key}_editor", None)
+    st.session_state.pop(f"{state_key}_csv", None)
+
+def load_dataset(kind, partition=GLOBAL_PARTITION):
+    entry = datasets.dataset(kind, partition)
+    state_key = frame_state_key(kind, partition)
+    seen = st.session_state.setdefault("seen_versions", {})
+    if seen.get(state_key, entry.version) != entry.version:
+        # A newer version was published; edits made against the old one no longer apply
+        drop_editor_state(state_key)
+    seen[state_key] = entry.version
+    return entry
+
+def load_frame(kind, partition=GLOBAL_PARTITION):
+    # Shared, read-only frame: never modify it in place, commit an edited copy instead
+    return load_dataset(kind, partition).frame
+
+def dept_frame(dept_key, kind):
+    return load_frame(kind, dept_key)
 
 # Baseline values for additional metrics (example values)
 if "spm_value" not in st.session_state:
@@ -110,464 +104,505 @@ if "qam_ref" not in st.session_state:
 # -------------------------------
 # Sidebar: Department Selection and Data Editors
 # -------------------------------
+def editor_column_config(df):
+    # Dates live in state as datetime64; DD.MM.YYYY is only a display/edit format
+    if "Date" in df.columns and hasattr(st, "column_config"):
+        return {"Date": st.column_config.DateColumn("Date", format="DD.MM.YYYY")}
+    return None
+
+def read_editor(kind, state_key, current, csv_label, num_rows):
+    # Data editor (or CSV text area fallback) output with native dates and the schema's compact dtypes
+    if data_editor is not None:
+        return compact_frame(kind, data_editor(current, num_rows=num_rows, key=f"{state_key}_editor",
+                                               column_config=editor_column_config(current)))
+    csv_text = st.text_area(csv_label, value=current.to_csv(index=False, date_format=DATE_FORMAT),
+                            key=f"{state_key}_csv")
+    return compact_frame(kind, pd.read_csv(io.StringIO(csv_text), sep=",", float_precision="round_trip"))
+
+def commit_frame(kind, partition, edited):
+    # Persists an edited frame and publishes it to all sessions; returns False if saving failed
+    try:
+        datasets.commit(kind, partition, edited)
+    except (ValueError, TypeError) as e:
+        st.error(f"Could not save {kind} data: {e}")
+        return False
+    return True
+
+def sidebar_editor(kind, partition, csv_label, num_rows="dynamic"):
+    # Immediate mode: every edit writes back into session state (and the store) and reruns the app
+    state_key = frame_state_key(kind, partition)
+    current = load_frame(kind, partition)
+    try:
+        edited = read_editor(kind, state_key, current, csv_label, num_rows)
+    except Exception as e:
+        st.error(f"Error parsing {kind} data: {e}")
+        edited = current
+    if not edited.equals(current):
+        commit_frame(kind, partition, edited)
+
+def frame_diff(old, new):
+    # Rows added/removed/changed between two versions of a frame, matched by index
+    added = new.index.difference(old.index)
+    removed = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+    old_common = old.loc[common].reindex(columns=new.columns)
+    new_common = new.loc[common]
+    changed = ~((old_common == new_common) | (old_common.isna() & new_common.isna())).all(axis=1)
+    return len(added), len(removed), int(changed.sum())
+
+# Edit-buffer mode: each editor is a fragment, so typing only reruns that editor. Changes are staged
+# per editor, validated together and applied as one batch on "Apply" or once the editor has been
+# idle for the debounce interval; only then does the rest of the app rerun. The idle check needs the
+# fragment to poll, and run_every is only set on a full run, so the first staged edit of an editor
+# that is not polling yet triggers one full rerun to register it with a poll interval.
+EDIT_POLL_SECONDS = 1
+
+def buffered_editor(kind, partition, csv_label, num_rows, debounce_seconds):
+    state_key = frame_state_key(kind, partition)
+    staged = st.session_state.setdefault("edit_buffer", {}).get(state_key)
+    poll = EDIT_POLL_SECONDS if staged is not None and debounce_seconds > 0 else None
+    st.fragment(_buffered_editor_body, run_every=poll)(kind, partition, csv_label, num_rows, debounce_seconds,
+                                                       poll is not None)
+
+def _buffered_editor_body(kind, partition, csv_label, num_rows, debounce_seconds, polling):
+    state_key = frame_state_key(kind, partition)
+    buffer = st.session_state.setdefault("edit_buffer", {})
+    current = load_frame(kind, partition)
+    try:
+        edited = read_editor(kind, state_key, current, csv_label, num_rows)
+    except Exception as e:
+        st.error(f"Error parsing {kind} data: {e}")
+        edited = None
+    if edited is not None:
+        if edited.equals(current):
+            buffer.pop(state_key, None)
+        elif state_key not in buffer or not buffer[state_key]["frame"].equals(edited):
+            buffer[state_key] = {"frame": edited, "edited_at": time.monotonic()}
+    staged = buffer.get(state_key)
+    if staged is None:
+        return
+    if debounce_seconds > 0 and not polling:
+        st.rerun()
+    added, removed, changed = frame_diff(current, staged["frame"])
+    st.caption(f"Pending: {added} added, {removed} removed, {changed} changed row(s)")
+    apply_col, discard_col = st.columns(2)
+    apply_clicked = apply_col.button("Apply", key=f"{state_key}_apply")
+    if discard_col.button("Discard", key=f"{state_key}_discard"):
+        drop_editor_state(state_key)
+        st.rerun()
+    idle = time.monotonic() - staged["edited_at"]
+    if apply_clicked or (debounce_seconds > 0 and idle >= debounce_seconds):
+        from ingest import IngestError, validate_frame
+        try:
+            validate_frame(kind, staged["frame"])
+        except IngestError as e:
+            st.error(f"Not applied: {e}")
+            return
+        if commit_frame(kind, partition, staged["frame"]):
+            # The editor's own edit state refers to the old data; start fresh from the applied frame
+            drop_editor_state(state_key)
+            st.rerun()
+
+def edit_frame(kind, partition, csv_label, num_rows="dynamic"):
+    if batch_edits:
+        buffered_editor(kind, partition, csv_label, num_rows, debounce_seconds)
+    else:
+        sidebar_editor(kind, partition, csv_label, num_rows)
+
 selected_dept = st.sidebar.selectbox(
     "Select a Department:",
-    options=["GRA-Overall", "Governance", "Risk", "Audit & Assessment"]
+    options=[departments.overall_label] + departments.names()
 )
 
-if selected_dept == "GRA-Overall":
+batch_edits = st.sidebar.toggle("Batch edits (stage changes, apply together)", value=True, key="batch_edits")
+debounce_seconds = 0
+if batch_edits:
+    debounce_seconds = st.sidebar.number_input("Auto-apply after idle seconds (0 = only on Apply)",
+                                               min_value=0, max_value=300, value=5, key="edit_debounce")
+
+if selected_dept == departments.overall_label:
     st.sidebar.markdown("### Data Editor for Overall")
     with st.sidebar.expander("Edit EAC Data"):
-        if data_editor is not None:
-            edited_eac = data_editor(st.session_state["EAC"], num_rows="dynamic", key="EAC_editor")
-        else:
-            csv_text = st.text_area("EAC Data (CSV)", value=st.session_state["EAC"].to_csv(index=False), key="EAC_csv")
-            try:
-                edited_eac = pd.read_csv(io.StringIO(csv_text), sep=",")
-            except Exception as e:
-                st.error(f"Error parsing CSV: {e}")
-                edited_eac = st.session_state["EAC"]
-        st.session_state["EAC"] = edited_eac
+        edit_frame("EAC", GLOBAL_PARTITION, "EAC Data (CSV)")
     with st.sidebar.expander("Edit SPM Data"):
-        if data_editor is not None:
-            edited_spm = data_editor(st.session_state["SPM"], num_rows="static", key="SPM_editor")
-        else:
-            csv_text = st.text_area("SPM Data (CSV)", value=st.session_state["SPM"].to_csv(index=False), key="SPM_csv")
-            try:
-                edited_spm = pd.read_csv(io.StringIO(csv_text), sep=",")
-            except Exception as e:
-                st.error(f"Error parsing CSV: {e}")
-                edited_spm = st.session_state["SPM"]
-        st.session_state["SPM"] = edited_spm
+        edit_frame("SPM", GLOBAL_PARTITION, "SPM Data (CSV)", num_rows="static")
 else:
-    dept_key = {"Governance": "Gov", "Risk": "Risk", "Audit & Assessment": "Audit"}[selected_dept]
+    dept_key = departments.by_name(selected_dept).key
     st.sidebar.markdown(f"### Data Editor for {selected_dept}")
-    with st.sidebar.expander(f"{selected_dept} – CFD Data"):
-        if data_editor is not None:
-            edited = data_editor(st.session_state[f"{dept_key}_CFD"], num_rows="dynamic", key=f"{dept_key}_CFD_editor")
-        else:
-            csv_text = st.text_area(f"CFD {selected_dept} (CSV)", value=st.session_state[f"{dept_key}_CFD"].to_csv(index=False), key=f"{dept_key}_CFD_csv")
-            try:
-                edited = pd.read_csv(io.StringIO(csv_text), sep=",")
-            except Exception as e:
-                st.error(f"Error parsing CSV: {e}")
-                edited = st.session_state[f"{dept_key}_CFD"]
-        st.session_state[f"{dept_key}_CFD"] = edited
-    with st.sidebar.expander(f"{selected_dept} – BDC Data"):
-        if data_editor is not None:
-            edited = data_editor(st.session_state[f"{dept_key}_BDC"], num_rows="dynamic", key=f"{dept_key}_BDC_editor")
-        else:
-            csv_text = st.text_area(f"BDC {selected_dept} (CSV)", value=st.session_state[f"{dept_key}_BDC"].to_csv(index=False), key=f"{dept_key}_BDC_csv")
-            try:
-                edited = pd.read_csv(io.StringIO(csv_text), sep=",")
-            except Exception as e:
-                st.error(f"Error parsing CSV: {e}")
-                edited = st.session_state[f"{dept_key}_BDC"]
-        st.session_state[f"{dept_key}_BDC"] = edited
-    with st.sidebar.expander(f"{selected_dept} – BUC Data"):
-        if data_editor is not None:
-            edited = data_editor(st.session_state[f"{dept_key}_BUC"], num_rows="dynamic", key=f"{dept_key}_BUC_editor")
-        else:
-            csv_text = st.text_area(f"BUC {selected_dept} (CSV)", value=st.session_state[f"{dept_key}_BUC"].to_csv(index=False), key=f"{dept_key}_BUC_csv")
-            try:
-                edited = pd.read_csv(io.StringIO(csv_text), sep=",")
-            except Exception as e:
-                st.error(f"Error parsing CSV: {e}")
-                edited = st.session_state[f"{dept_key}_BUC"]
-        st.session_state[f"{dept_key}_BUC"] = edited
+    for kind in DEPARTMENT_KINDS:
+        with st.sidebar.expander(f"{selected_dept} – {kind} Data"):
+            edit_frame(kind, dept_key, f"{kind} {selected_dept} (CSV)")
+
+# Resolution, granularity, zoom and WebGL switch for long time series; charts are downsampled to max_points
+# per trace and zooming into a date range brings back full resolution once the window fits that budget
+if selected_dept == departments.overall_label and datasets.pushdown:
+    page_frames = [datasets.overall(kind, departments.keys()) for kind in DEPARTMENT_KINDS]
+    page_frames.append(load_dataset("EAC"))
+elif selected_dept == departments.overall_label:
+    page_frames = [load_dataset(kind, dept) for dept in departments.keys() for kind in DEPARTMENT_KINDS]
+    page_frames.append(load_dataset("EAC"))
+else:
+    page_frames = [load_dataset(kind, dept_key) for kind in DEPARTMENT_KINDS]
+page_dates = [prepare_chart_frame(entry.frame, entry.fingerprint)["Date"] for entry in page_frames]
+page_dates = [dates for dates in page_dates if dates.notna().any()]
+x_range = None
+with st.sidebar.expander("Chart Options"):
+    max_points = st.number_input("Max points per series (about the chart width in px)",
+                                 min_value=100, max_value=20000, value=DEFAULT_MAX_POINTS, step=100,
+                                 key="max_points")
+    # Raw plots every row; day/week/month show the last value of each period, read from rollups built
+    # once per dataset version
+    granularity = st.selectbox("Granularity", GRANULARITIES, format_func=granularity_label, key="granularity")
+    if page_dates:
+        first_date = min(dates.min() for dates in page_dates).date()
+        last_date = max(dates.max() for dates in page_dates).date()
+        if first_date < last_date:
+            zoom = st.slider("Zoom to date range", min_value=first_date, max_value=last_date,
+                             value=(first_date, last_date), format="DD.MM.YYYY",
+                             key=f"zoom_{selected_dept}_{first_date}_{last_date}")
+            if zoom != (first_date, last_date):
+                x_range = (pd.Timestamp(zoom[0]), pd.Timestamp(zoom[1]) + pd.Timedelta(days=1) - pd.Timedelta(1))
+    webgl_threshold = st.number_input("Use WebGL rendering above this many points per series",
+                                      min_value=0, max_value=1_000_000, value=WEBGL_THRESHOLD, step=500,
+                                      key="webgl_threshold")
+chart_options = ChartOptions(max_points, x_range, webgl_threshold, granularity)
+
+with st.sidebar.expander("Import Data (Excel/CSV)"):
+    uploads = st.file_uploader("Workbook with CFD/BDC/BUC/EAC sheets or CFD.csv, BDC.csv, ... files",
+                               type=["xlsx", "csv"], accept_multiple_files=True, key="import_files")
+    import_path = st.text_input("Or a workbook / CSV directory on the server", key="import_path")
+    import_dept = st.selectbox("Department for rows without a 'Department' column",
+                               options=departments.names(), key="import_dept")
+    if st.button("Import", key="import_button"):
+        from ingest import IngestError, ingest, load_path, load_upload
+        try:
+            frames = {}
+            for upload in uploads or []:
+                frames.update(load_upload(upload.name, upload.getvalue()))
+            if import_path:
+                frames.update(load_path(import_path.strip()))
+            if not frames:
+                st.warning("Nothing to import.")
+            else:
+                written = ingest(frames, store, departments.by_name(import_dept).key, set(departments.keys()))
+                for kind, partition, _ in written:
+                    # Every session reloads imported frames from the store on next access
+                    datasets.reload(kind, partition)
+                st.success("Imported " + ", ".join(f"{kind}/{partition} ({rows} rows)"
+                                                   for kind, partition, rows in written))
+        except (IngestError, ValueError, OSError) as e:
+            # ValueError: the store rejected the rows (e.g. the SQLite backend's column checks)
+            st.error(f"Import failed: {e}")
+
+if refresher is not None:
+    with st.sidebar.expander("Data Sources"):
+        st.caption(f"Refreshed every {refresher.interval:g} s in the background; charts update when new rows arrive.")
+        st.dataframe(pd.DataFrame(refresher.status()), hide_index=True)
+
+with st.sidebar.expander("Export Report"):
+    # Same figures as the app, rendered into one HTML file for sharing outside the dashboard
+    if st.button("Build HTML report", key="report_button"):
+        # Imported on demand; the report pulls in the rendering code that ordinary reruns never need
+        from report import build_report
+        report_frames = {(kind, GLOBAL_PARTITION): load_frame(kind) for kind in ("EAC", "SPM")}
+        report_frames.update({(kind, dept): dept_frame(dept, kind)
+                              for dept in departments.keys() for kind in DEPARTMENT_KINDS})
+        st.session_state["report_html"] = build_report(report_frames, departments, workers=1)
+    if "report_html" in st.session_state:
+        st.download_button("Download report", st.session_state["report_html"],
+                           file_name="gra_report.html", mime="text/html", key="report_download")
 
 # -------------------------------
 # Main Area: Display Charts and Gauges
 # -------------------------------
 st.title(f"{selected_dept} Dashboard")
 
-def render_charts_for_dept(dept_key, dept_name, color_scheme):
-    st.markdown(f"### {dept_name} – Charts and Metrics")
-    
-    # CFD Chart and Description
-    st.markdown("**CFD (Cumulative Flow Diagram):** This diagram displays the cumulative count of items in the statuses 'Backlog', 'In Progress', and 'Done' over time.")
-    df_cfd = st.session_state[f"{dept_key}_CFD"].copy()
-    df_cfd["Date"] = convert_date(df_cfd["Date"])
-    df_cfd = df_cfd.sort_values("Date")
-    fig_cfd = go.Figure()
-    for stage, col, trace_color in zip(["Backlog", "In Progress", "Done"],
-                                       ["Backlog", "In Progress", "Done"],
-                                       ["#1f77b4", "#ff7f0e", "#2ca02c"]):
-        fig_cfd.add_trace(go.Scatter(
-            x=df_cfd["Date"],
-            y=df_cfd[col],
-            mode="lines",
-            name=stage,
-            stackgroup="one",
-            line=dict(color=trace_color, width=2, shape="linear"),
-            hovertemplate='%{x|%d.%m.%Y}<br>' + stage + ': %{y}<extra></extra>'
-        ))
-    fig_cfd.update_layout(title=f"{dept_name} – Cumulative Flow Diagram (CFD)",
-                          xaxis_title="Date", yaxis_title="Count",
-                          xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_cfd, use_container_width=True)
-    
-    # BDC Chart and Description
-    st.markdown("**BDC (Burndown Chart):** This chart compares the ideal burndown (planned progress) with the actual progress over time.")
-    df_bdc = st.session_state[f"{dept_key}_BDC"].copy()
-    df_bdc["Date"] = convert_date(df_bdc["Date"])
-    df_bdc = df_bdc.sort_values("Date")
-    fig_bdc = go.Figure()
-    fig_bdc.add_trace(go.Scatter(
-        x=df_bdc["Date"], y=df_bdc["Ideal"],
-        mode='lines', name='Ideal Burndown',
-        line=dict(dash='dash', color='green'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Ideal: %{y}<extra></extra>'
-    ))
-    fig_bdc.add_trace(go.Scatter(
-        x=df_bdc["Date"], y=df_bdc["Actual"],
-        mode='lines+markers', name='Actual Burndown',
-        line=dict(color='red'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Actual: %{y}<extra></extra>'
-    ))
-    fig_bdc.update_layout(title=f"{dept_name} – Burndown Chart (BDC)",
-                          xaxis_title="Date", yaxis_title="Work Remaining (%)",
-                          xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_bdc, use_container_width=True)
-    
-    # BUC Chart and Description
-    st.markdown("**BUC (Burnup Chart):** This chart illustrates the total project scope and the completed work over time, reflecting progress and any scope changes.")
-    df_buc = st.session_state[f"{dept_key}_BUC"].copy()
-    df_buc["Date"] = convert_date(df_buc["Date"])
-    df_buc = df_buc.sort_values("Date")
-    fig_buc = go.Figure()
-    fig_buc.add_trace(go.Scatter(
-        x=df_buc["Date"], y=df_buc["Total Scope"],
-        mode='lines', name='Total Scope',
-        line=dict(color=color_scheme),
-        hovertemplate='%{x|%d.%m.%Y}<br>Total Scope: %{y}<extra></extra>'
-    ))
-    fig_buc.add_trace(go.Scatter(
-        x=df_buc["Date"], y=df_buc["Completed"],
-        mode='lines+markers', name='Completed',
-        line=dict(color='orange'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Completed: %{y}<extra></extra>'
-    ))
-    fig_buc.update_layout(title=f"{dept_name} – Burnup Chart (BUC)",
-                          xaxis_title="Date", yaxis_title="Work Units",
-                          xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_buc, use_container_width=True)
-
-# Render charts based on Sidebar selection
-if selected_dept == "GRA-Overall":
-    st.markdown("### Overall GRA – Aggregated Charts and Metrics")
-    
-    # --- Gauge Charts for SPM, SV, CCPM, CV, and North Star ---
-    st.markdown("**Performance Metrics Gauges:** These gauges provide a quick overview of project performance. The SPM gauge indicates field progress vs. planned progress. The SV gauge shows the schedule variance (SPM - 100). The CCPM gauge is calculated based on the aggregated EAC data. The CV gauge represents cost variance (simulated). Finally, the North Star KPI gauge displays an overall project performance indicator (simulated).")
-    
-    # SPM from SPM data
-    spm_df = st.session_state["SPM"]
-    spm_value = (spm_df["Earned"].iloc[0] / spm_df["Planned"].iloc[0]) * 100
-    spm_value = round(spm_value, 2)
-    spm_ref = 100
-    # SV: Schedule Variance = SPM - 100
-    sv_value = spm_value - 100
-    sv_ref = 0
+# Each chart section lives in its own tab and only the open tab is computed and sent to the browser.
+# The whole main area is a fragment, so switching tabs reruns just this part of the script; sidebar
+# edits still rerun the app but only rebuild the section that is currently open.
+OVERALL_SECTIONS = ["Gauges", "CFD", "BDC", "BUC", "EAC", "Forecast"]
+DEPT_SECTIONS = [*DEPARTMENT_KINDS, "Forecast"]
+
+def show_chart(fig):
+    # st.plotly_chart, recording the spec size and render time while profiling is on
+    if profiling.active() is not None:
+        with profiling.stage("serialize"):
+            payload_bytes = len(fig.to_json().encode())
+        profiling.record_payload("payload", payload_bytes)
+    with profiling.stage("render"):
+        st.plotly_chart(fig, width="stretch")
+
+def render_gauge(title, value, reference):
+    fig = cached_figure(build_gauge_figure, (title, value, reference),
+                        lambda: (title, value, reference))
+    show_chart(fig)
+
+def overall_eac():
+    eac = load_dataset("EAC")
+    return eac.fingerprint, prepare_chart_frame(eac.frame, eac.fingerprint)
+
+def ccpm_value(df_eac):
     # CCPM: based on aggregated EAC data (last record)
-    df_eac = st.session_state["EAC"].copy()
-    df_eac["Date"] = convert_date(df_eac["Date"])
-    df_eac = df_eac.sort_values("Date")
     last_row = df_eac.iloc[-1]
-    ccp_value = (last_row["Actual Cost"] / last_row["Forecast Cost"]) * 100
-    ccp_value = round(ccp_value, 2)
-    ccp_ref = 100
-    # CV: Simulated cost variance (for example, -10)
-    cv_value = -10
-    cv_ref = 0
-    # North Star KPI: Simulated overall project health indicator (for example, average of SPM and inverse variances)
-    northstar_value = round((spm_value + (100 - abs(sv_value)) + (100 - abs(cv_value)))/3, 2)
-    northstar_ref = 100
-
-    col1, col2, col3, col4, col5 = st.columns(5)
-    fig_spm = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=spm_value,
-        delta={'reference': spm_ref},
-        title={'text': "SPM"},
-        gauge={
-            'axis': {'range': [0, 100]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [0, 50], 'color': "red"},
-                {'range': [50, 80], 'color': "yellow"},
-                {'range': [80, 100], 'color': "green"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': spm_ref
-            }
-        }
-    ))
-    fig_sv = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=sv_value,
-        delta={'reference': sv_ref, 'position': "bottom"},
-        title={'text': "SV"},
-        gauge={
-            'axis': {'range': [-50, 50]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [-50, 0], 'color': "red"},
-                {'range': [0, 50], 'color': "green"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': sv_ref
-            }
-        }
-    ))
-    fig_ccpm = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=ccp_value,
-        delta={'reference': ccp_ref},
-        title={'text': "CCPM"},
-        gauge={
-            'axis': {'range': [0, 150]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [0, 50], 'color': "red"},
-                {'range': [50, 75], 'color': "yellow"},
-                {'range': [75, 150], 'color': "green"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': ccp_ref
-            }
-        }
-    ))
-    fig_cv = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=cv_value,
-        delta={'reference': cv_ref, 'position': "bottom"},
-        title={'text': "CV"},
-        gauge={
-            'axis': {'range': [-50, 50]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [-50, 0], 'color': "red"},
-                {'range': [0, 50], 'color': "green"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': cv_ref
-            }
-        }
-    ))
-    fig_north = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=northstar_value,
-        delta={'reference': northstar_ref},
-        title={'text': "North Star KPI"},
-        gauge={
-            'axis': {'range': [0, 100]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [0, 60], 'color': "red"},
-                {'range': [60, 80], 'color': "yellow"},
-                {'range': [80, 100], 'color': "green"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': northstar_ref
-            }
-        }
-    ))
-    with col1:
-        st.plotly_chart(fig_spm, use_container_width=True)
-    with col2:
-        st.plotly_chart(fig_sv, use_container_width=True)
-    with col3:
-        st.plotly_chart(fig_ccpm, use_container_width=True)
-    with col4:
-        st.plotly_chart(fig_cv, use_container_width=True)
-    with col5:
-        st.plotly_chart(fig_north, use_container_width=True)
-    
-    # Aggregated CFD Description
-    st.markdown("**CFD (Cumulative Flow Diagram):** This diagram displays the aggregated cumulative count of items in 'Backlog', 'In Progress', and 'Done' over time.")
-    dfs_cfd = []
-    for dept in ["Gov", "Risk", "Audit"]:
-        df = st.session_state[f"{dept}_CFD"].copy()
-        df["Date"] = convert_date(df["Date"])
-        dfs_cfd.append(df)
-    df_overall_cfd = pd.concat(dfs_cfd).groupby("Date", as_index=False).sum()
-    fig_overall_cfd = go.Figure()
-    for stage, col, trace_color in zip(["Backlog", "In Progress", "Done"],
-                                       ["Backlog", "In Progress", "Done"],
-                                       ["#1f77b4", "#ff7f0e", "#2ca02c"]):
-        fig_overall_cfd.add_trace(go.Scatter(
-            x=df_overall_cfd["Date"],
-            y=df_overall_cfd[col],
-            mode="lines",
-            name=stage,
-            stackgroup="one",
-            line=dict(color=trace_color, width=2, shape="linear"),
-            hovertemplate='%{x|%d.%m.%Y}<br>' + stage + ': %{y}<extra></extra>'
-        ))
-    fig_overall_cfd.update_layout(title="Overall GRA – Cumulative Flow Diagram (CFD)",
-                                  xaxis_title="Date", yaxis_title="Count",
-                                  xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_overall_cfd, use_container_width=True)
-    
-    # Aggregated BDC Description
-    st.markdown("**BDC (Burndown Chart):** This chart compares the ideal burndown (planned progress) with the actual progress over time, aggregated from all sub-departments.")
-    dfs_bdc = []
-    for dept in ["Gov", "Risk", "Audit"]:
-        df = st.session_state[f"{dept}_BDC"].copy()
-        df["Date"] = convert_date(df["Date"])
-        dfs_bdc.append(df)
-    df_overall_bdc = pd.concat(dfs_bdc).groupby("Date", as_index=False).sum()
-    fig_overall_bdc = go.Figure()
-    fig_overall_bdc.add_trace(go.Scatter(
-        x=df_overall_bdc["Date"], y=df_overall_bdc["Ideal"],
-        mode='lines', name='Ideal Burndown',
-        line=dict(dash='dash', color='green'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Ideal: %{y}<extra></extra>'
-    ))
-    fig_overall_bdc.add_trace(go.Scatter(
-        x=df_overall_bdc["Date"], y=df_overall_bdc["Actual"],
-        mode='lines+markers', name='Actual Burndown',
-        line=dict(color='red'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Actual: %{y}<extra></extra>'
-    ))
-    fig_overall_bdc.update_layout(title="Overall GRA – Burndown Chart (BDC)",
-                                  xaxis_title="Date", yaxis_title="Work Remaining (%)",
-                                  xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_overall_bdc, use_container_width=True)
-    
-    # Aggregated BUC Description
-    st.markdown("**BUC (Burnup Chart):** This chart illustrates the aggregated total project scope and the completed work over time.")
-    dfs_buc = []
-    for dept in ["Gov", "Risk", "Audit"]:
-        df = st.session_state[f"{dept}_BUC"].copy()
-        df["Date"] = convert_date(df["Date"])
-        dfs_buc.append(df)
-    df_overall_buc = pd.concat(dfs_buc).groupby("Date", as_index=False).sum()
-    fig_overall_buc = go.Figure()
-    fig_overall_buc.add_trace(go.Scatter(
-        x=df_overall_buc["Date"], y=df_overall_buc["Total Scope"],
-        mode='lines', name='Total Scope',
-        line=dict(color='purple'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Total Scope: %{y}<extra></extra>'
-    ))
-    fig_overall_buc.add_trace(go.Scatter(
-        x=df_overall_buc["Date"], y=df_overall_buc["Completed"],
-        mode='lines+markers', name='Completed',
-        line=dict(color='orange'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Completed: %{y}<extra></extra>'
-    ))
-    fig_overall_buc.update_layout(title="Overall GRA – Burnup Chart (BUC)",
-                                  xaxis_title="Date", yaxis_title="Work Units",
-                                  xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_overall_buc, use_container_width=True)
-    
-    # EAC Chart Description
-    st.markdown("**EAC (Estimate at Completion):** This chart compares actual cost with forecast cost over time, helping to assess whether corrective action is needed.")
-    df_overall_eac = st.session_state["EAC"].copy()
-    df_overall_eac["Date"] = convert_date(df_overall_eac["Date"])
-    df_overall_eac = df_overall_eac.sort_values("Date")
-    fig_overall_eac = go.Figure()
-    fig_overall_eac.add_trace(go.Scatter(
-        x=df_overall_eac["Date"], y=df_overall_eac["Actual Cost"],
-        mode='lines+markers', name='Actual Cost',
-        line=dict(color='brown'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Actual Cost: %{y}<extra></extra>'
-    ))
-    fig_overall_eac.add_trace(go.Scatter(
-        x=df_overall_eac["Date"], y=df_overall_eac["Forecast Cost"],
-        mode='lines+markers', name='Forecast Cost',
-        line=dict(dash='dash', color='gray'),
-        hovertemplate='%{x|%d.%m.%Y}<br>Forecast Cost: %{y}<extra></extra>'
-    ))
-    fig_overall_eac.update_layout(title="Overall GRA – Estimate at Completion (EAC)",
-                                  xaxis_title="Date", yaxis_title="Cost (€)",
-                                  xaxis=dict(tickformat="%d.%m.%Y"))
-    st.plotly_chart(fig_overall_eac, use_container_width=True)
-    
-    st.markdown("### Conclusion")
-    st.markdown("""
-    The aggregated data from the sub-departments is combined here.
-    Changes in the data editors (in the sidebar) will be reflected in the charts after a rerun or tab change.
-    """)
-else:
-    dept_key = {"Governance": "Gov", "Risk": "Risk", "Audit & Assessment": "Audit"}[selected_dept]
-    def render_charts_for_dept(dept_key, dept_name, color_scheme):
-        st.markdown(f"### {dept_name} – Charts and Metrics")
+    return float(metrics.ccpm(last_row["Actual Cost"], last_row["Forecast Cost"]))
+
+def overall_cv():
+    # CV of the Overall cost forecast (simulated without one); gauges, trends and batch jobs share it
+    cost = project_forecast(dept_keys=()).cost
+    return metrics.cost_variance(cv_value=cost["CV"] if cost else None)
+
+def overall_kpi_history(spm_df, eac_fingerprint, df_eac):
+    history = datasets.kpi_history()
+    cv_value = overall_cv()
+    history.update((load_dataset("SPM").fingerprint, eac_fingerprint, cv_value), lambda: (spm_df, df_eac),
+                   cv_value=cv_value)
+    return history
+
+def overall_dataset(kind):
+    # Current per-date sum over all departments as (prepared frame, content key)
+    if datasets.pushdown:
+        entry = datasets.overall(kind, departments.keys())
+        return prepare_chart_frame(entry.frame, entry.fingerprint), entry.fingerprint
+    aggregate = datasets.aggregate(kind)
+    entries = {dept: load_dataset(kind, dept) for dept in departments.keys()}
+    aggregate.update_many((dept, entry.fingerprint,
+                           lambda entry=entry: prepare_chart_frame(entry.frame, entry.fingerprint))
+                          for dept, entry in entries.items())
+    # Departments removed from departments.toml (reloaded without a restart) leave the sums
+    aggregate.prune(entries)
+    return aggregate.frame(), aggregate.key
+
+def project_forecast(dept_keys=None, overall=True):
+    # Completion-date forecasts, the Overall cost forecast and the chart projections; computed once per
+    # combination of dataset versions and shared by all sessions. dept_keys limits the department rows
+    # (None: every department) and overall adds the Overall sums and the cost forecast. Trials are seeded
+    # per name, so a row is the same whichever subset it is computed with.
+    dept_keys = list(departments.keys()) if dept_keys is None else list(dept_keys)
+    entries = {(kind, dept): load_dataset(kind, dept) for kind in DEPARTMENT_KINDS for dept in dept_keys}
+    key = ("forecast", tuple((kind, dept, entry.fingerprint) for (kind, dept), entry in entries.items()))
+    overall_frames, df_eac = {}, None
+    if overall:
+        overall_frames = {kind: overall_dataset(kind) for kind in DEPARTMENT_KINDS}
+        eac_fingerprint, df_eac = overall_eac()
+        key += (tuple(frame_key for _, frame_key in overall_frames.values()), eac_fingerprint)
+
+    def compute():
+        with profiling.stage("forecast"):
+            frames = {kind: {departments.by_key(dept).name: prepare_chart_frame(entry.frame, entry.fingerprint)
+                             for (entry_kind, dept), entry in entries.items() if entry_kind == kind}
+                      for kind in DEPARTMENT_KINDS}
+            for kind, (frame, _) in overall_frames.items():
+                frames[kind][departments.overall_title] = frame
+            return forecast.project_forecast(frames["CFD"], frames["BDC"], frames["BUC"], df_eac,
+                                             departments.overall_title)
+    return forecast_cache.get_or_compute(key, compute)
+
+def dept_forecast(dept):
+    # Forecast of one department page; only that department's frames are loaded
+    return project_forecast([dept.key], overall=False)
+
+def render_forecast_table(table):
+    # Completion dates as DD.MM.YYYY, "–" where a forecast is not possible
+    st.dataframe(table.apply(lambda dates: dates.dt.strftime(DATE_FORMAT)).fillna("–"))
+    st.caption(f"Trend forecasts extend a least-squares line through the history. Throughput forecasts come from "
+               f"{forecast.MC_TRIALS:,} Monte Carlo trials drawing the CFD's per-record 'Done' increments until the "
+               f"remaining Backlog + In Progress is done (P85: 85% of trials finish by that date).")
+
+def render_kpi_trend(history, kpi, chart_options):
+    fig = cached_figure(build_kpi_trend_figure, (history.key, kpi, metrics.KPI_REFERENCES[kpi], chart_options),
+                        lambda: (rolled_up_frame(history.frame(), history.key, chart_options.granularity),
+                                 kpi, metrics.KPI_REFERENCES[kpi], chart_options))
+    show_chart(fig)
+
+def render_overall_gauges(chart_options):
+    st.markdown("**Performance Metrics Gauges:** These gauges provide a quick overview of project performance. The SPM gauge indicates field progress vs. planned progress. The SV gauge shows the schedule variance (SPM - 100). The CCPM gauge is calculated based on the aggregated EAC data. The CV gauge shows the cost variance of the estimate at completion against the budget (see the Forecast tab). Finally, the North Star KPI gauge displays an overall project performance indicator (simulated). The trend chart below each gauge shows the same KPI for every EAC date.")
+
+    # KPI formulas live in metrics so batch jobs compute exactly what the gauges show
+    spm_df = load_frame("SPM")
+    eac_fingerprint, df_eac = overall_eac()
+    with profiling.stage("kpi"):
+        kpis = metrics.kpi_snapshot(spm_df, df_eac, cv_value=overall_cv())
+        history = overall_kpi_history(spm_df, eac_fingerprint, df_eac)
+
+    for col, title in zip(st.columns(5), metrics.KPI_COLUMNS):
+        with col:
+            render_gauge(title, kpis[title], metrics.KPI_REFERENCES[title])
+            render_kpi_trend(history, title, chart_options)
+
+def overall_chart_figure(builder, kind, *args, granularity=None):
+    # Figure of the shared running per-date sum over every department's frame of this kind
+    if datasets.pushdown:
+        # SQL backends sum across departments in the query; only the per-date result is loaded
+        entry = datasets.overall(kind, departments.keys())
+        return chart_figure(builder, entry.frame, *args, fingerprint=entry.fingerprint, granularity=granularity)
+    entries = {dept: load_dataset(kind, dept) for dept in departments.keys()}
+    return aggregate_chart_figure(builder, datasets.aggregate(kind),
+                                  {dept: entry.frame for dept, entry in entries.items()}, *args,
+                                  fingerprints={dept: entry.fingerprint for dept, entry in entries.items()},
+                                  granularity=granularity)
+
+def dept_chart_figure(builder, dept_key, kind, *args, granularity=None):
+    entry = load_dataset(kind, dept_key)
+    return chart_figure(builder, entry.frame, *args, fingerprint=entry.fingerprint, granularity=granularity)
+
+def render_overall_section(section, chart_options):
+    if section == "Gauges":
+        render_overall_gauges(chart_options)
+    elif section == "CFD":
+        st.markdown("**CFD (Cumulative Flow Diagram):** This diagram displays the aggregated cumulative count of items in 'Backlog', 'In Progress', and 'Done' over time.")
+        fig_overall_cfd = overall_chart_figure(
+            build_cfd_figure, "CFD",
+            chart_title(departments.overall_title, "CFD"), chart_options,
+            granularity=chart_options.granularity)
+        show_chart(fig_overall_cfd)
+    elif section == "BDC":
+        st.markdown("**BDC (Burndown Chart):** This chart compares the ideal burndown (planned progress) with the actual progress over time, aggregated from all sub-departments.")
+        fig_overall_bdc = overall_chart_figure(
+            build_bdc_figure, "BDC",
+            chart_title(departments.overall_title, "BDC"), chart_options,
+            project_forecast(dept_keys=()).projections.get(("BDC", departments.overall_title)),
+            granularity=chart_options.granularity)
+        show_chart(fig_overall_bdc)
+    elif section == "BUC":
+        st.markdown("**BUC (Burnup Chart):** This chart illustrates the aggregated total project scope and the completed work over time.")
+        fig_overall_buc = overall_chart_figure(
+            build_buc_figure, "BUC",
+            chart_title(departments.overall_title, "BUC"), OVERALL_SCOPE_COLOR, chart_options,
+            project_forecast(dept_keys=()).projections.get(("BUC", departments.overall_title)),
+            granularity=chart_options.granularity)
+        show_chart(fig_overall_buc)
+    elif section == "EAC":
+        st.markdown("**EAC (Estimate at Completion):** This chart compares actual cost with forecast cost over time, helping to assess whether corrective action is needed.")
+        eac_fingerprint, df_eac = overall_eac()
+        eac_title = chart_title(departments.overall_title, "EAC")
+        projection = project_forecast(dept_keys=()).projections.get(("EAC", departments.overall_title))
+        chart_col, gauge_col = st.columns([4, 1])
+        with chart_col:
+            fig_overall_eac = cached_figure(build_eac_figure,
+                                            (eac_fingerprint, eac_title, chart_options, projection),
+                                            lambda: (rolled_up_frame(df_eac, eac_fingerprint, chart_options.granularity),
+                                                     eac_title, chart_options, projection))
+            show_chart(fig_overall_eac)
+        with gauge_col:
+            # CCPM depends on EAC only, so an EAC edit rebuilds just this section
+            render_gauge("CCPM", ccpm_value(df_eac), metrics.KPI_REFERENCES["CCPM"])
+            history = overall_kpi_history(load_frame("SPM"), eac_fingerprint, df_eac)
+            render_kpi_trend(history, "CCPM", chart_options)
+    elif section == "Forecast":
+        st.markdown("**Forecast:** Projected completion dates per department and for the aggregated project, and the estimated cost at completion.")
+        result = project_forecast()
+        render_forecast_table(result.table)
+        if result.cost is not None:
+            cost = result.cost
+            for col, (label, value) in zip(st.columns(4), [
+                    ("Projected completion", "–" if pd.isna(cost["Completion"]) else cost["Completion"].strftime(DATE_FORMAT)),
+                    ("Estimate at completion", "–" if pd.isna(cost["EAC"]) else f"{cost['EAC']:,.0f} €"),
+                    ("Budget (latest Forecast Cost)", f"{cost['Budget']:,.0f} €"),
+                    ("Cost variance", "–" if pd.isna(cost["CV"]) else f"{cost['CV']:.1f} %")]):
+                col.metric(label, value)
+
+def render_dept_section(section, dept, chart_options):
+    if section == "CFD":
         st.markdown("**CFD (Cumulative Flow Diagram):** This diagram shows the evolution of counts in 'Backlog', 'In Progress', and 'Done' over time.")
-        df_cfd = st.session_state[f"{dept_key}_CFD"].copy()
-        df_cfd["Date"] = convert_date(df_cfd["Date"])
-        df_cfd = df_cfd.sort_values("Date")
-        fig_cfd = go.Figure()
-        for stage, col, trace_color in zip(["Backlog", "In Progress", "Done"],
-                                           ["Backlog", "In Progress", "Done"],
-                                           ["#1f77b4", "#ff7f0e", "#2ca02c"]):
-            fig_cfd.add_trace(go.Scatter(
-                x=df_cfd["Date"],
-                y=df_cfd[col],
-                mode="lines",
-                name=stage,
-                stackgroup="one",
-                line=dict(color=trace_color, width=2, shape="linear"),
-                hovertemplate='%{x|%d.%m.%Y}<br>' + stage + ': %{y}<extra></extra>'
-            ))
-        fig_cfd.update_layout(title=f"{dept_name} – Cumulative Flow Diagram (CFD)",
-                              xaxis_title="Date", yaxis_title="Count",
-                              xaxis=dict(tickformat="%d.%m.%Y"))
-        st.plotly_chart(fig_cfd, use_container_width=True)
-        
+        fig_cfd = dept_chart_figure(build_cfd_figure, dept.key, "CFD",
+                                     chart_title(dept.name, "CFD"), chart_options,
+                                     granularity=chart_options.granularity)
+        show_chart(fig_cfd)
+    elif section == "BDC":
         st.markdown("**BDC (Burndown Chart):** This chart compares the ideal burndown with the actual progress over time.")
-        df_bdc = st.session_state[f"{dept_key}_BDC"].copy()
-        df_bdc["Date"] = convert_date(df_bdc["Date"])
-        df_bdc = df_bdc.sort_values("Date")
-        fig_bdc = go.Figure()
-        fig_bdc.add_trace(go.Scatter(
-            x=df_bdc["Date"], y=df_bdc["Ideal"],
-            mode='lines', name='Ideal Burndown',
-            line=dict(dash='dash', color='green'),
-            hovertemplate='%{x|%d.%m.%Y}<br>Ideal: %{y}<extra></extra>'
-        ))
-        fig_bdc.add_trace(go.Scatter(
-            x=df_bdc["Date"], y=df_bdc["Actual"],
-            mode='lines+markers', name='Actual Burndown',
-            line=dict(color='red'),
-            hovertemplate='%{x|%d.%m.%Y}<br>Actual: %{y}<extra></extra>'
-        ))
-        fig_bdc.update_layout(title=f"{dept_name} – Burndown Chart (BDC)",
-                              xaxis_title="Date", yaxis_title="Work Remaining (%)",
-                              xaxis=dict(tickformat="%d.%m.%Y"))
-        st.plotly_chart(fig_bdc, use_container_width=True)
-        
+        fig_bdc = dept_chart_figure(build_bdc_figure, dept.key, "BDC",
+                                     chart_title(dept.name, "BDC"), chart_options,
+                                     dept_forecast(dept).projections.get(("BDC", dept.name)),
+                                     granularity=chart_options.granularity)
+        show_chart(fig_bdc)
+    elif section == "BUC":
         st.markdown("**BUC (Burnup Chart):** This chart displays the total project scope and the completed work over time, indicating progress and scope changes.")
-        df_buc = st.session_state[f"{dept_key}_BUC"].copy()
-        df_buc["Date"] = convert_date(df_buc["Date"])
-        df_buc = df_buc.sort_values("Date")
-        fig_buc = go.Figure()
-        fig_buc.add_trace(go.Scatter(
-            x=df_buc["Date"], y=df_buc["Total Scope"],
-            mode='lines', name='Total Scope',
-            line=dict(color=color_scheme),
-            hovertemplate='%{x|%d.%m.%Y}<br>Total Scope: %{y}<extra></extra>'
-        ))
-        fig_buc.add_trace(go.Scatter(
-            x=df_buc["Date"], y=df_buc["Completed"],
-            mode='lines+markers', name='Completed',
-            line=dict(color='orange'),
-            hovertemplate='%{x|%d.%m.%Y}<br>Completed: %{y}<extra></extra>'
-        ))
-        fig_buc.update_layout(title=f"{dept_name} – Burnup Chart (BUC)",
-                              xaxis_title="Date", yaxis_title="Work Units",
-                              xaxis=dict(tickformat="%d.%m.%Y"))
-        st.plotly_chart(fig_buc, use_container_width=True)
-    
-    render_charts_for_dept(dept_key, selected_dept, {"Governance": "blue", "Risk": "red", "Audit & Assessment": "green"}[selected_dept])
+        fig_buc = dept_chart_figure(build_buc_figure, dept.key, "BUC",
+                                     chart_title(dept.name, "BUC"), dept.color, chart_options,
+                                     dept_forecast(dept).projections.get(("BUC", dept.name)),
+                                     granularity=chart_options.granularity)
+        show_chart(fig_buc)
+    elif section == "Forecast":
+        st.markdown("**Forecast:** Projected completion dates for this department.")
+        render_forecast_table(dept_forecast(dept).table)
+
+def render_sections(sections, render_section, tabs_key):
+    # Lazy tabs: only the open tab's body runs
+    for section, tab in zip(sections, st.tabs(sections, on_change="rerun", key=tabs_key)):
+        if tab.open:
+            with tab, profiling.section(section):
+                render_section(section)
 
+# Caches whose hit/miss counters the profiling panel reports
+PROFILED_CACHES = {"prepared frames": prepared_cache, "rollups": rollup_cache, "figures": figure_cache,
+                   "forecasts": forecast_cache, "store": store.cache}
+PROFILE_LOG_SIZE = 100
+
+if "profile_log" not in st.session_state:
+    st.session_state["profile_log"] = deque(maxlen=PROFILE_LOG_SIZE)
+
+@st.fragment
+def render_main_area(selected_dept, chart_options):
+    if not st.session_state.get("profiling", False):
+        render_main_content(selected_dept, chart_options)
+        return
+    with profiling.profile_run(selected_dept, PROFILED_CACHES) as profile:
+        render_main_content(selected_dept, chart_options)
+    st.session_state["profile_log"].append(profile)
+    # Optional JSON-lines log on the server, for comparing runs across deployments
+    log_path = os.environ.get("DASHBOARD_PROFILE_LOG")
+    if log_path:
+        profiling.append_log_file(profile, log_path)
+
+def render_main_content(selected_dept, chart_options):
+    if selected_dept == departments.overall_label:
+        st.markdown(f"### {departments.overall_title} – Aggregated Charts and Metrics")
+        render_sections(OVERALL_SECTIONS,
+                        lambda section: render_overall_section(section, chart_options),
+                        "overall_section")
+        st.markdown("### Conclusion")
+        st.markdown("""
+        The aggregated data from the sub-departments is combined here.
+        Changes in the data editors (in the sidebar) will be reflected in the charts after a rerun or tab change.
+        """)
+    else:
+        dept = departments.by_name(selected_dept)
+        st.markdown(f"### {dept.name} – Charts and Metrics")
+        render_sections(DEPT_SECTIONS,
+                        lambda section: render_dept_section(section, dept, chart_options),
+                        f"{dept.key}_section")
+
+render_main_area(selected_dept, chart_options)
+
+# Other sessions' edits and imports bump the shared version; poll it and rerun to show them
+DATASET_POLL_SECONDS = 2
+
+@st.fragment(run_every=DATASET_POLL_SECONDS)
+def watch_shared_datasets():
+    if datasets.version != st.session_state.get("rendered_version", datasets.version):
+        st.rerun()
+
+st.session_state["rendered_version"] = datasets.version
+watch_shared_datasets()
+
+# -------------------------------
+# Profiling Panel
+# -------------------------------
+# Placed last so it shows the run that just finished; fragment-only reruns (tab switches) are logged
+# too and show up here on the next full rerun
+with st.sidebar.expander("Profiling"):
+    st.toggle("Profile reruns (stage timings, cache hits, payload sizes)", value=False, key="profiling")
+    profile_log = st.session_state["profile_log"]
+    if profile_log:
+        last_profile = profile_log[-1]
+        st.caption(f"Last run: {last_profile.label}, {last_profile.duration * 1000:.1f} ms")
+        st.caption(f"Shared datasets in memory: {datasets.nbytes() / 1e6:.2f} MB")
+        st.dataframe(pd.DataFrame(last_profile.summary()), hide_index=True)
+        if last_profile.cache_events:
+            st.dataframe(pd.DataFrame(last_profile.cache_events), hide_index=True)
+        st.download_button("Download JSON log", profiling.dumps_log(profile_log),
+                           file_name="dashboard_profile.json", mime="application/json",
+                           key="profile_download")
+        if st.button("Clear log", key="profile_clear"):
+            profile_log.clear()
+            st.rerun()
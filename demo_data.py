@@ -0,0 +1,183 @@
+"""Seeded demo datasets shown for partitions that have no stored data yet.
+
+Every (kind, partition) gets its own reproducible frame, seeded from its
+name, so all server processes and restarts show the same demo charts and
+forecasts. Frames are generated in memory on first use; generating one is
+about as cheap as reading it back from disk, so no build step is needed.
+
+Optionally the frames can be frozen into one Parquet file
+(``demo_data.parquet`` next to this module, or ``DASHBOARD_DEMO_CACHE``),
+e.g. to keep showing the same demo data after the generators change.
+Partitions found in it are read from the file instead of generated; the
+dashboard never writes it::
+
+    python demo_data.py --departments departments.toml
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from schema import SCHEMAS, compact_frame
+from store import GLOBAL_PARTITION
+
+DEFAULT_CACHE_PATH = Path(__file__).with_name("demo_data.parquet")
+
+_KIND = "_kind"
+_PARTITION = "_partition"
+
+
+# -------------------------------
+# Generators
+# -------------------------------
+def demo_cfd(rng):
+    dates = pd.date_range(start="2025-01-02", periods=20)
+    return pd.DataFrame({
+        "Date": dates,
+        "Backlog": rng.integers(50, 100, size=20),
+        "In Progress": rng.integers(20, 70, size=20),
+        "Done": rng.integers(10, 50, size=20)
+    })
+
+
+def demo_bdc(rng):
+    dates = pd.date_range(start="2025-02-01", periods=15)
+    ideal = np.linspace(100, 0, 15)
+    return pd.DataFrame({"Date": dates, "Ideal": ideal, "Actual": ideal + rng.normal(0, 5, 15)})
+
+
+def demo_buc(rng):
+    dates = pd.date_range(start="2025-03-01", periods=15)
+    return pd.DataFrame({"Date": dates,
+                         "Total Scope": np.linspace(100, 130, 15),
+                         "Completed": np.linspace(0, 100, 15) + rng.normal(0, 5, 15)})
+
+
+def demo_eac(rng):
+    dates = pd.date_range(start="2025-04-01", periods=15)
+    actual_costs = np.linspace(0, 80000, 15) + rng.normal(0, 2000, 15)
+    return pd.DataFrame({"Date": dates, "Actual Cost": actual_costs,
+                         "Forecast Cost": actual_costs[-1] + np.linspace(0, 20000, 15)})
+
+
+def demo_spm(rng):
+    # For SPM: Planned and Earned values; for example, if planned = 100 and earned = 75.
+    return pd.DataFrame({"Planned": [100], "Earned": [75]})
+
+
+GENERATORS = {"CFD": demo_cfd, "BDC": demo_bdc, "BUC": demo_buc, "EAC": demo_eac, "SPM": demo_spm}
+
+
+def generate(kind, partition=GLOBAL_PARTITION):
+    # Demo frame for one partition, identical on every call and in every process
+    rng = np.random.default_rng(zlib.crc32(f"{kind}/{partition}".encode()))
+    return compact_frame(kind, GENERATORS[kind](rng))
+
+
+# -------------------------------
+# Cache File
+# -------------------------------
+class DemoData:
+    """Demo frames by (kind, partition), read from the Parquet file when it holds them."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._frames = {}
+        self._cached = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # (long frame, {(kind, partition): row positions}) of the cache file; empty if it is missing or unreadable
+        try:
+            long = pd.read_parquet(self.path)
+            return long, long.groupby([_KIND, _PARTITION], sort=False).indices
+        except (OSError, ValueError, KeyError):
+            return None, {}
+
+    def _cached_frame(self, kind, partition):
+        # Frame for the partition from the cache file, or None if the file does not hold it
+        if self._cached is None:
+            self._cached = self._load()
+        long, positions = self._cached
+        rows = positions.get((kind, partition))
+        if rows is None or kind not in SCHEMAS:
+            return None
+        part = long.iloc[rows]
+        columns = [col for col in ["Date", *SCHEMAS[kind]] if col in part.columns and part[col].notna().all()]
+        return compact_frame(kind, part[columns].reset_index(drop=True))
+
+    def save(self):
+        # Writes every frame held in memory; the file is replaced atomically
+        with self._lock:
+            frames = dict(self._frames)
+        long = pd.concat([df.assign(**{_KIND: kind, _PARTITION: partition})
+                          for (kind, partition), df in frames.items()], ignore_index=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".parquet.tmp")
+        os.close(fd)
+        try:
+            long.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def frame(self, kind, partition=GLOBAL_PARTITION):
+        with self._lock:
+            frame = self._frames.get((kind, partition))
+            if frame is None:
+                frame = self._cached_frame(kind, partition)
+                if frame is None:
+                    frame = generate(kind, partition)
+                self._frames[(kind, partition)] = frame
+            return frame
+
+    def precompute(self, partitions):
+        # Generates the global EAC/SPM frames and CFD/BDC/BUC for every partition, then writes the file
+        frames = {(kind, GLOBAL_PARTITION): generate(kind) for kind in ("EAC", "SPM")}
+        frames.update({(kind, partition): generate(kind, partition)
+                       for partition in partitions for kind in ("CFD", "BDC", "BUC")})
+        with self._lock:
+            self._frames = frames
+        self.save()
+        return len(frames)
+
+    def defaults(self):
+        # {kind: callable(partition)} for SharedDatasets
+        return {kind: (lambda partition, kind=kind: self.frame(kind, partition)) for kind in GENERATORS}
+
+
+_demo_data = None
+_demo_data_lock = threading.Lock()
+
+
+def get_demo_data():
+    # Process-wide demo data for DASHBOARD_DEMO_CACHE (default: demo_data.parquet next to this file)
+    global _demo_data
+    with _demo_data_lock:
+        if _demo_data is None:
+            _demo_data = DemoData(os.environ.get("DASHBOARD_DEMO_CACHE", DEFAULT_CACHE_PATH))
+        return _demo_data
+
+
+def main(argv=None):
+    from departments import load_departments
+    parser = argparse.ArgumentParser(description="Freeze the demo datasets into a Parquet file for the dashboard.")
+    parser.add_argument("--departments", help="department registry TOML (default: DASHBOARD_DEPARTMENTS)")
+    parser.add_argument("--output", default=os.environ.get("DASHBOARD_DEMO_CACHE", str(DEFAULT_CACHE_PATH)))
+    args = parser.parse_args(argv)
+
+    registry = load_departments(args.departments)
+    count = DemoData(args.output).precompute(registry.keys())
+    print(f"Wrote {count} demo datasets to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Department registry loaded from ``departments.toml``.
+
+The registry drives session initialization, the sidebar, per-department
+rendering and the Overall aggregation, so adding a department or team is a
+config change instead of a code change. Set ``DASHBOARD_DEPARTMENTS`` to point
+at a different config file.
+"""
+import os
+import threading
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_CONFIG_PATH = Path(__file__).with_name("departments.toml")
+
+
+@dataclass(frozen=True)
+class Department:
+    key: str
+    name: str
+    color: str = "blue"
+
+
+class DepartmentRegistry:
+    """Ordered collection of departments, addressable by key or display name."""
+
+    def __init__(self, departments, overall_label="GRA-Overall", overall_title="Overall GRA"):
+        self.departments = list(departments)
+        self.overall_label = overall_label
+        self.overall_title = overall_title
+        self._by_key = {dept.key: dept for dept in self.departments}
+        self._by_name = {dept.name: dept for dept in self.departments}
+        if len(self._by_key) != len(self.departments):
+            raise ValueError("Department keys must be unique")
+        if len(self._by_name) != len(self.departments) or overall_label in self._by_name:
+            raise ValueError("Department names must be unique and differ from the overall label")
+
+    def __iter__(self):
+        return iter(self.departments)
+
+    def __len__(self):
+        return len(self.departments)
+
+    def keys(self):
+        return [dept.key for dept in self.departments]
+
+    def names(self):
+        return [dept.name for dept in self.departments]
+
+    def by_key(self, key):
+        return self._by_key[key]
+
+    def by_name(self, name):
+        return self._by_name[name]
+
+
+def parse_registry(config):
+    # Builds a registry from an already parsed config mapping
+    departments = [Department(key=str(entry["key"]),
+                              name=str(entry.get("name", entry["key"])),
+                              color=str(entry.get("color", "blue")))
+                   for entry in config.get("departments", [])]
+    if not departments:
+        raise ValueError("Department config must define at least one [[departments]] entry")
+    return DepartmentRegistry(departments,
+                              overall_label=config.get("overall_label", "GRA-Overall"),
+                              overall_title=config.get("overall_title", "Overall GRA"))
+
+
+_registry_cache = {}
+_registry_lock = threading.Lock()
+
+
+def load_departments(path=None):
+    # Parsed once per (path, mtime) so the config can be edited without restarting the server
+    path = Path(path or os.environ.get("DASHBOARD_DEPARTMENTS", DEFAULT_CONFIG_PATH))
+    cache_key = (str(path.resolve()), path.stat().st_mtime_ns)
+    with _registry_lock:
+        registry = _registry_cache.get(cache_key)
+        if registry is None:
+            with open(path, "rb") as f:
+                registry = parse_registry(tomllib.load(f))
+            _registry_cache.clear()
+            _registry_cache[cache_key] = registry
+        return registry
@@ -0,0 +1,131 @@
+"""Server-side downsampling for long chart series.
+
+Line traces use Largest-Triangle-Three-Buckets (LTTB), which keeps the visual
+shape of a series with one point per horizontal pixel. Stacked CFD areas use
+min/max buckets with indices shared by all stages, so the stacked traces keep
+a common x axis and every local extreme of each stage survives.
+
+``rollup_frame`` reduces a series to day/week/month granularity by keeping
+the last row of each period, which is the period-end state of the
+cumulative series the dashboard plots (flow counts, remaining work, costs).
+Granularity ``None`` (raw, the default) keeps every row, including several
+rows per day.
+"""
+import numpy as np
+import pandas as pd
+
+# Roughly the pixel width of a full-width chart; one LTTB point per pixel
+DEFAULT_MAX_POINTS = 1200
+
+# None plots every row (raw); the others keep the last row of each period
+GRANULARITIES = [None, "day", "week", "month"]
+
+
+def granularity_label(granularity):
+    return "Raw" if granularity is None else granularity.capitalize()
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    # Indices of the n_out points LTTB keeps (always including the first and last point)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def _bucket_extremes(values, bucket_ids, n_buckets):
+    # Per bucket, the index of the minimum and maximum value
+    order = np.lexsort((values, bucket_ids))
+    sorted_buckets = bucket_ids[order]
+    bucket_range = np.arange(n_buckets)
+    first = np.searchsorted(sorted_buckets, bucket_range, side="left")
+    last = np.searchsorted(sorted_buckets, bucket_range, side="right") - 1
+    return order[first], order[last]
+
+
+def minmax_indices(columns, n_out):
+    # Shared indices keeping each column's min and max per bucket, plus the first and last point
+    n = len(columns[0])
+    n_buckets = n_out // (2 * len(columns))
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+    bucket_ids = np.arange(n) * n_buckets // n
+    keep = [np.array([0, n - 1])]
+    for values in columns:
+        low, high = _bucket_extremes(_as_float(values), bucket_ids, n_buckets)
+        keep.extend([low, high])
+    return np.unique(np.concatenate(keep))
+
+
+def _period_keys(dates, granularity):
+    # Integer period number of each date: days since epoch, Monday-based weeks or months
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        # 1970-01-01 was a Thursday
+        return (days + 3) // 7
+    if granularity == "month":
+        return dates.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown granularity {granularity!r}; use one of {', '.join(map(str, GRANULARITIES))}")
+
+
+def rollup_frame(df, granularity):
+    # Last row of every period of a Date-sorted frame; df itself when every row already ends its period
+    if granularity is None or len(df) < 2:
+        return df
+    keys = _period_keys(df["Date"].to_numpy(), granularity)
+    last = np.empty(len(keys), dtype=bool)
+    np.not_equal(keys[1:], keys[:-1], out=last[:-1])
+    last[-1] = True
+    return df if last.all() else df[last]
+
+
+def slice_dates(df, x_range):
+    # Rows of a Date-sorted frame inside [start, end]; binary search instead of a boolean mask
+    if x_range is None:
+        return df
+    dates = df["Date"].to_numpy()
+    start, end = (np.datetime64(pd.Timestamp(v), "ns") for v in x_range)
+    lo = np.searchsorted(dates, start, side="left")
+    hi = np.searchsorted(dates, end, side="right")
+    return df.iloc[lo:hi]
+
+
+def lttb_xy(df, column, max_points):
+    # (x, y) arrays of one line trace reduced to at most max_points points
+    x = df["Date"].to_numpy()
+    y = df[column].to_numpy()
+    if max_points is None or len(df) <= max_points:
+        return x, y
+    keep = lttb_indices(x, y, max_points)
+    return x[keep], y[keep]
+
+
+def minmax_frame(df, columns, max_points):
+    # Rows of a stacked-area frame reduced with shared min/max buckets
+    if max_points is None or len(df) <= max_points:
+        return df
+    return df.iloc[minmax_indices([df[col].to_numpy() for col in columns], max_points)]
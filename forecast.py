@@ -0,0 +1,259 @@
+"""Completion-date and cost-at-completion forecasts.
+
+Nothing here imports Streamlit. Like ``metrics``, every forecast is
+vectorized over departments: series of different lengths are padded into one
+NaN-masked matrix and fitted or simulated together.
+
+* Trend forecasts fit a least-squares line per department (value per day).
+  The burndown is complete where the ``Actual`` trend reaches zero. The burnup
+  is complete where the ``Completed`` trend meets the ``Total Scope`` trend.
+* Throughput forecasts are a Monte Carlo simulation: each trial draws
+  per-record ``Done`` increments of the CFD (with replacement) until the
+  remaining ``Backlog`` + ``In Progress`` work is done. Trials run as one
+  (departments x trials x steps) array, a block of steps at a time, until
+  every trial has finished. Random draws are seeded per department name, so
+  a department gets the same dates whichever departments it is batched with.
+* The cost forecast extends the ``Actual Cost`` trend to a completion date.
+  That gives the estimate at completion and the cost variance against the
+  latest ``Forecast Cost`` (the budget).
+
+Dates that cannot be forecast (flat or wrong-way trends, no throughput) are
+NaT.
+"""
+import zlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+MC_TRIALS = 5000
+MC_PERCENTILES = (50, 85, 95)
+# Simulation stops after this many records' worth of throughput (about ten years of daily data)
+MAX_STEPS = 3650
+# Steps simulated per block, and the upper bound on simulated values held at once
+_STEP_BLOCK = 64
+_BLOCK_ELEMENTS = 4_000_000
+_NS_PER_DAY = 86_400 * 10**9
+
+FORECAST_COLUMNS = ["Burndown Trend", "Burnup Trend"] + [f"Throughput P{p}" for p in MC_PERCENTILES]
+
+ProjectForecast = namedtuple("ProjectForecast", ["table", "cost", "projections"])
+
+# Straight forecast line for a chart: two (date, value) points, hashable so figures can cache on it
+Projection = namedtuple("Projection", ["dates", "values"])
+
+
+# -------------------------------
+# Padded Series
+# -------------------------------
+def _days(dates):
+    # datetime64 values as float days since epoch
+    return np.asarray(dates, dtype="datetime64[ns]").astype(np.int64) / _NS_PER_DAY
+
+
+def _to_dates(days):
+    # Float days since epoch -> datetime64[ns] (NaN and infinities become NaT)
+    days = np.asarray(days, dtype=float)
+    result = np.full(days.shape, np.datetime64("NaT"), dtype="datetime64[ns]")
+    finite = np.isfinite(days) & (np.abs(days) < 100_000)
+    result[finite] = (days[finite] * _NS_PER_DAY).astype(np.int64).astype("datetime64[ns]")
+    return result
+
+
+def _padded(arrays):
+    # Rows of different lengths -> (rows x longest) float matrix padded with NaN, and the row lengths
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    matrix = np.full((len(arrays), max(lengths.max(initial=0), 1)), np.nan)
+    for row, values in enumerate(arrays):
+        matrix[row, :len(values)] = values
+    return matrix, lengths
+
+
+def linear_trend(x, y):
+    # Least-squares slope and intercept of every row of padded (x, y) matrices; NaN below two points
+    mask = ~(np.isnan(x) | np.isnan(y))
+    n = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0).sum(axis=1) / n
+        y_mean = np.where(mask, y, 0).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0)
+        dy = np.where(mask, y - y_mean[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    slope[n < 2] = np.nan
+    return slope, y_mean - slope * x_mean
+
+
+# -------------------------------
+# Trend Forecasts
+# -------------------------------
+def _fit(frames, column):
+    # (slope per day, intercept, last date in days) per frame for one value column
+    x, _ = _padded([_days(df["Date"]) for df in frames])
+    y, _ = _padded([df[column].to_numpy(dtype=float) for df in frames])
+    slope, intercept = linear_trend(x, y)
+    return slope, intercept, np.nanmax(x, axis=1)
+
+
+def _crossing(slope, intercept, target_slope, target_intercept, last_day, direction):
+    # Day at which a trend line reaches a target line, moving down (direction=-1) or up (+1) to it.
+    # Lines already at or past the target are complete on their last record; NaN if never reached.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap_now = direction * ((intercept - target_intercept) + (slope - target_slope) * last_day)
+        rate = direction * (slope - target_slope)
+        day = np.where(gap_now >= 0, last_day, np.where(rate > 0, last_day - gap_now / rate, np.nan))
+    return day
+
+
+def burndown_completion(frames):
+    # {name: prepared BDC frame} -> completion date per name where the Actual trend reaches zero
+    names = list(frames)
+    if not names:
+        return pd.Series(dtype="datetime64[ns]")
+    slope, intercept, last = _fit(list(frames.values()), "Actual")
+    zero = np.zeros_like(slope)
+    return pd.Series(_to_dates(_crossing(slope, intercept, zero, zero, last, -1)), index=names)
+
+
+def burnup_completion(frames):
+    # {name: prepared BUC frame} -> completion date per name where Completed meets Total Scope
+    names = list(frames)
+    if not names:
+        return pd.Series(dtype="datetime64[ns]")
+    done_slope, done_intercept, last = _fit(list(frames.values()), "Completed")
+    scope_slope, scope_intercept, _ = _fit(list(frames.values()), "Total Scope")
+    return pd.Series(_to_dates(_crossing(done_slope, done_intercept, scope_slope, scope_intercept, last, 1)),
+                     index=names)
+
+
+def trend_projection(df, column, until, target=None):
+    # Projection of a column's trend from its last record to `until` (or to where it reaches `target`)
+    if df is None or len(df) < 2 or pd.isna(until):
+        return None
+    slope, intercept, last = _fit([df], column)
+    end = _days([until])[0]
+    if not np.isfinite(slope[0]) or end <= last[0]:
+        return None
+    values = intercept[0] + slope[0] * np.array([last[0], end])
+    if target is not None:
+        values[1] = target
+    return Projection(tuple(pd.Timestamp(d) for d in _to_dates([last[0], end])),
+                      tuple(float(v) for v in values))
+
+
+# -------------------------------
+# Monte Carlo Throughput
+# -------------------------------
+def _throughput_inputs(frames):
+    # Per-record Done increments (negative corrections count as zero), remaining work and record spacing
+    increments, remaining, spacing, last = [], [], [], []
+    for df in frames:
+        done = df["Done"].to_numpy(dtype=float)
+        increments.append(np.clip(np.diff(done), 0, None))
+        remaining.append(float(df["Backlog"].iloc[-1] + df["In Progress"].iloc[-1]) if len(df) else np.nan)
+        days = _days(df["Date"])
+        spacing.append(float(np.median(np.diff(days))) if len(days) > 1 else np.nan)
+        last.append(days[-1] if len(days) else np.nan)
+    return increments, np.array(remaining), np.array(spacing), np.array(last)
+
+
+def simulate_steps(increments, remaining, seeds, trials=MC_TRIALS, max_steps=MAX_STEPS):
+    # (rows x trials) number of records each trial needs to finish `remaining`; NaN if it never does.
+    # Each row draws from its own seeded generator, so its result does not depend on the other rows.
+    samples, counts = _padded(increments)
+    rows = len(increments)
+    steps = np.full((rows, trials), np.nan)
+    steps[remaining <= 0] = 0
+    # Rows without any throughput or work left are settled already
+    can_finish = (counts > 0) & (np.nan_to_num(samples).max(axis=1) > 0) & (remaining > 0)
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    chunk = max(1, _BLOCK_ELEMENTS // (trials * _STEP_BLOCK))
+    completed = np.zeros((rows, trials))
+    for start in range(0, max_steps, _STEP_BLOCK):
+        pending = np.flatnonzero(can_finish & np.isnan(steps).any(axis=1))
+        if not len(pending):
+            break
+        width = min(_STEP_BLOCK, max_steps - start)
+        for active in np.array_split(pending, -(-len(pending) // chunk)):
+            uniform = np.stack([rngs[row].random((trials, width)) for row in active])
+            draws = (uniform * counts[active, None, None]).astype(np.int64)
+            cumulative = completed[active, :, None] + np.cumsum(samples[active[:, None, None], draws], axis=2)
+            reached = cumulative >= remaining[active, None, None]
+            first = np.where(reached.any(axis=2), reached.argmax(axis=2), -1)
+            block_steps = steps[active]
+            finished = np.isnan(block_steps) & (first >= 0)
+            block_steps[finished] = start + first[finished] + 1
+            steps[active] = block_steps
+            completed[active] = cumulative[:, :, -1]
+    return steps
+
+
+def throughput_completion(frames, trials=MC_TRIALS, seed=0, percentiles=MC_PERCENTILES):
+    # {name: prepared CFD frame} -> frame of completion-date percentiles per name
+    names = list(frames)
+    columns = [f"Throughput P{p}" for p in percentiles]
+    if not names:
+        return pd.DataFrame(columns=columns, dtype="datetime64[ns]")
+    increments, remaining, spacing, last = _throughput_inputs(list(frames.values()))
+    seeds = [[seed, zlib.crc32(str(name).encode())] for name in names]
+    steps = simulate_steps(increments, remaining, seeds, trials)
+    # Unfinished trials count as never, so a percentile they reach is NaT
+    with np.errstate(invalid="ignore"):
+        quantiles = np.percentile(np.where(np.isnan(steps), np.inf, steps), percentiles, axis=1).T
+    days = last[:, None] + quantiles * spacing[:, None]
+    return pd.DataFrame(_to_dates(days), index=names, columns=columns)
+
+
+# -------------------------------
+# Combined Forecasts
+# -------------------------------
+def forecast_table(cfd_frames, bdc_frames, buc_frames, trials=MC_TRIALS, seed=0):
+    # One row per name (department or overall) with every completion-date forecast (FORECAST_COLUMNS)
+    names = list(dict.fromkeys([*cfd_frames, *bdc_frames, *buc_frames]))
+    table = pd.DataFrame(index=pd.Index(names, name="Department"))
+    table["Burndown Trend"] = burndown_completion(bdc_frames)
+    table["Burnup Trend"] = burnup_completion(buc_frames)
+    table = table.join(throughput_completion(cfd_frames, trials, seed))
+    return table[FORECAST_COLUMNS]
+
+
+def completion_date(row):
+    # Date used for the cost forecast: Monte Carlo P85, else the burnup or burndown trend
+    for column in ("Throughput P85", "Burnup Trend", "Burndown Trend"):
+        if column in row and pd.notna(row[column]):
+            return row[column]
+    return pd.NaT
+
+
+def project_forecast(cfd_frames, bdc_frames, buc_frames, eac_df, overall_name, trials=MC_TRIALS, seed=0):
+    # Forecast table, the Overall cost forecast (None without EAC data) and the chart projections,
+    # {(kind, name): Projection or None}, for frames keyed by department name plus `overall_name`
+    table = forecast_table(cfd_frames, bdc_frames, buc_frames, trials, seed)
+    projections = {}
+    for name, df in bdc_frames.items():
+        projections[("BDC", name)] = trend_projection(df, "Actual", table.at[name, "Burndown Trend"], target=0)
+    for name, df in buc_frames.items():
+        projections[("BUC", name)] = trend_projection(df, "Completed", table.at[name, "Burnup Trend"])
+    cost = None
+    if eac_df is not None and len(eac_df):
+        completion = completion_date(table.loc[overall_name]) if overall_name in table.index else pd.NaT
+        cost = cost_forecast(eac_df, completion)
+        if pd.notna(cost["EAC"]):
+            projections[("EAC", overall_name)] = trend_projection(eac_df, "Actual Cost", completion,
+                                                                  target=cost["EAC"])
+    return ProjectForecast(table, cost, projections)
+
+
+def cost_forecast(eac_df, completion_date):
+    # Estimate at completion from the Actual Cost trend, and CV in percent of the latest Forecast Cost
+    budget = float(eac_df.sort_values("Date", kind="stable")["Forecast Cost"].iloc[-1]) if len(eac_df) else np.nan
+    result = {"Completion": completion_date, "Budget": budget, "EAC": np.nan, "CV": np.nan}
+    if len(eac_df) < 2 or pd.isna(completion_date):
+        return result
+    slope, intercept, last = _fit([eac_df], "Actual Cost")
+    at = max(_days([completion_date])[0], last[0])
+    latest_actual = float(eac_df["Actual Cost"].iloc[-1])
+    estimate = max(float(intercept[0] + slope[0] * at), latest_actual)
+    result["EAC"] = round(estimate, 2)
+    if budget:
+        result["CV"] = round((budget - estimate) / budget * 100, 2)
+    return result
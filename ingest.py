@@ -0,0 +1,225 @@
+"""Bulk Excel/CSV ingestion into the columnar data store.
+
+A source is either an ``.xlsx`` workbook with sheets named after the chart
+types (CFD, BDC, BUC, EAC, optionally SPM), a directory of ``<KIND>.csv``
+files, or a single ``<KIND>.csv`` file. Rows are streamed in chunks,
+the header is validated once per sheet, dates must be ``DD.MM.YYYY`` (or
+native Excel dates) and value columns are converted to compact dtypes.
+
+An optional ``Department`` column splits CFD/BDC/BUC rows into per-department
+partitions; without it all rows go to the department chosen at import time.
+Parsed results are cached keyed by file path, mtime and size (or content hash
+for uploads), so re-running the import on an unchanged file is free.
+"""
+import datetime
+import hashlib
+import io
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline import LRUCache, parse_dates
+from schema import DATED_KINDS, DEPARTMENT_COLUMN, DEPARTMENT_KINDS, SCHEMAS, compact_frame, fits_dtype
+from store import GLOBAL_PARTITION
+
+CHUNK_ROWS = 50_000
+
+
+class IngestError(ValueError):
+    pass
+
+
+# -------------------------------
+# Validation and Typing
+# -------------------------------
+def _check_header(kind, columns):
+    required = (["Date"] if kind in DATED_KINDS else []) + list(SCHEMAS[kind])
+    missing = [col for col in required if col not in columns]
+    if missing:
+        raise IngestError(f"{kind}: missing column(s) {', '.join(missing)}")
+
+
+def _typed_chunk(kind, chunk):
+    typed = pd.DataFrame(index=chunk.index)
+    if kind in DATED_KINDS:
+        # Excel cells may already hold datetime objects; strings must be DD.MM.YYYY.
+        # Distinct values are parsed once, so long repetitive date columns stay cheap.
+        dates = chunk["Date"]
+        if dates.isna().any():
+            raise IngestError(f"{kind}: missing date")
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            # Anything else (e.g. an Excel serial number) would be read as nanoseconds since 1970
+            wrong = [v for v in pd.unique(dates.astype(object)) if not isinstance(v, (str, datetime.date, np.datetime64))]
+            if wrong:
+                raise IngestError(f"{kind}: invalid date {wrong[0]!r}, expected DD.MM.YYYY")
+        parsed = parse_dates(dates, errors="coerce")
+        bad = parsed.isna()
+        if bad.any():
+            raise IngestError(f"{kind}: invalid date {dates[bad].iloc[0]!r}, expected DD.MM.YYYY")
+        typed["Date"] = parsed
+    if kind in DEPARTMENT_KINDS and DEPARTMENT_COLUMN in chunk.columns:
+        typed[DEPARTMENT_COLUMN] = chunk[DEPARTMENT_COLUMN].astype(str)
+    for col, dtype in SCHEMAS[kind].items():
+        values = pd.to_numeric(chunk[col], errors="coerce")
+        if values.isna().any():
+            raise IngestError(f"{kind}: non-numeric value in column {col!r}")
+        if not fits_dtype(values, np.dtype(dtype)):
+            raise IngestError(f"{kind}: value in column {col!r} is not a whole number in the {dtype} range")
+        typed[col] = values.astype(dtype)
+    return typed
+
+
+def _typed_frame(kind, chunks):
+    typed = [_typed_chunk(kind, chunk) for chunk in chunks]
+    if not typed:
+        raise IngestError(f"{kind}: no rows")
+    return compact_frame(kind, pd.concat(typed, ignore_index=True))
+
+
+def validate_frame(kind, df):
+    # Checks an edited frame against the same schema as imports; raises IngestError on the first problem
+    _check_header(kind, list(df.columns))
+    if df.empty:
+        raise IngestError(f"{kind}: no rows")
+    _typed_chunk(kind, df)
+
+
+# -------------------------------
+# Readers
+# -------------------------------
+def _iter_sheet_chunks(ws, kind):
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(c).strip() if c is not None else "" for c in header]
+    _check_header(kind, columns)
+    buffer = []
+    for row in rows:
+        if all(v is None for v in row):
+            continue
+        buffer.append(row)
+        if len(buffer) >= CHUNK_ROWS:
+            yield pd.DataFrame(buffer, columns=columns)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=columns)
+
+
+def read_workbook(source):
+    # Streams every known sheet of an .xlsx workbook (path or file-like) in read-only mode
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    try:
+        wb = load_workbook(source, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise IngestError(f"Not a valid .xlsx workbook: {e}") from e
+    try:
+        frames = {}
+        for kind in SCHEMAS:
+            if kind in wb.sheetnames:
+                frames[kind] = _typed_frame(kind, _iter_sheet_chunks(wb[kind], kind))
+        if not frames:
+            raise IngestError(f"No sheet named {', '.join(SCHEMAS)} found")
+        return frames
+    finally:
+        wb.close()
+
+
+def read_csv(source, kind):
+    header = pd.read_csv(source, nrows=0).columns
+    _check_header(kind, list(header))
+    if hasattr(source, "seek"):
+        source.seek(0)
+    chunks = pd.read_csv(source, chunksize=CHUNK_ROWS, dtype={"Date": str})
+    return {kind: _typed_frame(kind, chunks)}
+
+
+def read_sql_rows(connection, kind, after_rowid=0):
+    # Rows of the SQLite table named after the kind with rowid > after_rowid, typed like any import.
+    # Returns (frames, last rowid); frames is empty when there are no new rows.
+    query = f'SELECT rowid AS "_rowid", * FROM "{kind}" WHERE rowid > ? ORDER BY rowid'
+    chunk = pd.read_sql_query(query, connection, params=(after_rowid,), dtype={"Date": str})
+    if chunk.empty:
+        return {}, after_rowid
+    _check_header(kind, list(chunk.columns))
+    last_rowid = int(chunk["_rowid"].iloc[-1])
+    return {kind: _typed_frame(kind, [chunk.drop(columns="_rowid")])}, last_rowid
+
+
+def _kind_from_name(name):
+    kind = Path(name).stem.upper()
+    if kind not in SCHEMAS:
+        raise IngestError(f"Cannot tell chart type from file name {name!r}; use CFD/BDC/BUC/EAC/SPM.csv")
+    return kind
+
+
+def read_csv_dir(directory):
+    frames = {}
+    for path in sorted(Path(directory).glob("*.csv")):
+        if path.stem.upper() in SCHEMAS:
+            frames.update(read_csv(path, path.stem.upper()))
+    if not frames:
+        raise IngestError(f"No CFD/BDC/BUC/EAC/SPM .csv files in {directory}")
+    return frames
+
+
+# -------------------------------
+# Cached Loading
+# -------------------------------
+_ingest_cache = LRUCache(maxsize=32)
+
+
+def load_path(path):
+    # Parsed, typed frames for a workbook, CSV file or CSV directory; cached by path/mtime/size
+    path = Path(path)
+    if path.is_dir():
+        stats = tuple((p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in sorted(path.glob("*.csv")))
+        key = ("dir", str(path.resolve()), stats)
+        return _ingest_cache.get_or_compute(key, lambda: read_csv_dir(path))
+    stat = path.stat()
+    key = ("file", str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if path.suffix.lower() == ".csv":
+        return _ingest_cache.get_or_compute(key, lambda: read_csv(path, _kind_from_name(path.name)))
+    return _ingest_cache.get_or_compute(key, lambda: read_workbook(path))
+
+
+def load_upload(name, data):
+    # Parsed, typed frames for uploaded bytes; cached by content hash
+    key = ("upload", Path(name).suffix.lower(), hashlib.sha256(data).hexdigest())
+    if name.lower().endswith(".csv"):
+        return _ingest_cache.get_or_compute(key, lambda: read_csv(io.BytesIO(data), _kind_from_name(name)))
+    return _ingest_cache.get_or_compute(key, lambda: read_workbook(io.BytesIO(data)))
+
+
+# -------------------------------
+# Writing into the Store
+# -------------------------------
+def partition_frames(frames, default_partition):
+    # Yields (kind, partition, frame); Department columns split rows into per-department partitions
+    for kind, df in frames.items():
+        if kind not in DEPARTMENT_KINDS:
+            yield kind, GLOBAL_PARTITION, df
+        elif DEPARTMENT_COLUMN in df.columns:
+            for partition, part in df.groupby(DEPARTMENT_COLUMN, sort=True, observed=True):
+                yield kind, partition, part.drop(columns=DEPARTMENT_COLUMN).reset_index(drop=True)
+        else:
+            yield kind, default_partition, df
+
+
+def ingest(frames, store, default_partition, known_partitions=None):
+    # Writes typed frames into the store; returns [(kind, partition, rows)] for what was written
+    parts = list(partition_frames(frames, default_partition))
+    if known_partitions is not None:
+        for kind, partition, _ in parts:
+            if partition != GLOBAL_PARTITION and partition not in known_partitions:
+                raise IngestError(f"{kind}: unknown department {partition!r}")
+    written = []
+    for kind, partition, df in parts:
+        if kind in DATED_KINDS:
+            df = df.sort_values("Date", kind="stable").reset_index(drop=True)
+        store.write(kind, partition, df)
+        written.append((kind, partition, len(df)))
+    return written
@@ -0,0 +1,143 @@
+"""Batch KPI computation over one or more data stores, without Streamlit.
+
+For every project (a data store root as written by the dashboard or by
+``ingest``) this computes the gauge KPIs for each partition that has SPM/EAC
+data, the latest CFD/BDC/BUC values per department and an ``Overall`` row
+built from the per-date sums across departments. The Overall CV comes from
+the cost forecast over those sums, exactly as on the dashboard's gauges (the
+forecast is seeded with the registry's Overall title, so set
+``DASHBOARD_DEPARTMENTS`` as for the app). Work is split into (project,
+department chunk) tasks and run on a process pool.
+
+Usage::
+
+    python kpi_batch.py --data-dir data --data-dir /srv/projects/alpha/data \\
+        --data-dir sqlite:/srv/projects/beta/dashboard.db --output kpis.csv --workers 8
+"""
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from departments import load_departments
+from forecast import project_forecast
+from metrics import FLOW_COLUMNS, KPI_COLUMNS, kpi_table, latest_by_dept, sum_by_date
+from pipeline import prepare_chart_frame
+from store import DEFAULT_STORE_PATH, GLOBAL_PARTITION, open_store, store_exists
+
+OVERALL_ROW = "Overall"
+
+
+def _read_all(store, kind, partitions):
+    frames = {}
+    for partition in partitions:
+        df = store.read(kind, partition)
+        if df is not None and len(df):
+            frames[partition] = df
+    return frames
+
+
+def department_kpis(root, partitions):
+    # KPI and latest-value rows for the given departments of one store (the Overall row is overall_kpis)
+    store = open_store(root)
+    partitions = [p for p in partitions if p != GLOBAL_PARTITION]
+    table = kpi_table(_read_all(store, "SPM", partitions), _read_all(store, "EAC", partitions))
+    for kind in FLOW_COLUMNS:
+        latest = latest_by_dept(_read_all(store, kind, partitions))
+        if len(latest):
+            table = table.join(latest, how="outer")
+    return table
+
+
+def overall_kpis(root, partitions, overall_name):
+    # Overall row: latest values of the per-date sums across all departments and the gauge KPIs of the
+    # project-wide SPM/EAC records, with the CV of the cost forecast over those sums
+    store = open_store(root)
+    row, sums = {}, {}
+    for kind, columns in FLOW_COLUMNS.items():
+        if not partitions:
+            break
+        if hasattr(store, "sum_by_date"):
+            # SQL backends aggregate in the query instead of loading every department
+            overall = store.sum_by_date(kind, partitions)
+        else:
+            frames = list(_read_all(store, kind, partitions).values())
+            overall = sum_by_date([df[["Date"] + columns] for df in frames]) if frames else None
+        if overall is not None and len(overall):
+            sums[kind] = overall
+            row.update(overall.iloc[-1][columns].to_dict())
+    table = pd.DataFrame([row], index=pd.Index([OVERALL_ROW], name="Department"))
+    spm_df, eac_df = store.read("SPM", GLOBAL_PARTITION), store.read("EAC", GLOBAL_PARTITION)
+    if spm_df is None or eac_df is None or not len(spm_df) or not len(eac_df):
+        return table
+    cfd, bdc, buc = ({overall_name: sums[kind]} if kind in sums else {} for kind in ("CFD", "BDC", "BUC"))
+    cost = project_forecast(cfd, bdc, buc, prepare_chart_frame(eac_df), overall_name).cost
+    kpis = kpi_table({OVERALL_ROW: spm_df}, {OVERALL_ROW: eac_df}, {OVERALL_ROW: cost["CV"] if cost else None})
+    return kpis.join(table)
+
+
+def project_tasks(root, workers):
+    # Splits one project's departments into roughly one chunk per worker
+    store = open_store(root)
+    partitions = sorted({p for kind in ("SPM", "EAC", *FLOW_COLUMNS) for p in store.partitions(kind)})
+    if not partitions:
+        return []
+    size = max(1, math.ceil(len(partitions) / max(1, workers)))
+    return [partitions[i:i + size] for i in range(0, len(partitions), size)]
+
+
+def run_batch(roots, workers=None, overall_name=None):
+    workers = workers or os.cpu_count() or 1
+    overall_name = overall_name or load_departments().overall_title
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = []
+        for root in roots:
+            chunks = project_tasks(root, workers)
+            all_depts = [p for chunk in chunks for p in chunk if p != GLOBAL_PARTITION]
+            jobs.extend((root, pool.submit(department_kpis, root, chunk)) for chunk in chunks)
+            if chunks:
+                jobs.append((root, pool.submit(overall_kpis, root, all_depts, overall_name)))
+        for root, job in jobs:
+            part = job.result().reset_index()
+            part.insert(0, "Project", str(root))
+            results.append(part)
+    if not results:
+        return pd.DataFrame(columns=["Project", "Department"] + KPI_COLUMNS)
+    combined = pd.concat(results, ignore_index=True)
+    return combined.groupby(["Project", "Department"], sort=True, as_index=False).first()
+
+
+def write_output(df, output):
+    output = Path(output)
+    if output.suffix.lower() == ".parquet":
+        df.to_parquet(output, index=False)
+    else:
+        df.to_csv(output, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute dashboard KPIs for every department of one or more data stores.")
+    parser.add_argument("--data-dir", action="append", dest="data_dirs",
+                        help="data store root or sqlite:<path> (repeat for several projects); "
+                             "defaults to DASHBOARD_DATA_DIR or ./data")
+    parser.add_argument("--output", default="kpis.csv", help="output file (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    roots = args.data_dirs or [os.environ.get("DASHBOARD_DATA_DIR", str(DEFAULT_STORE_PATH))]
+    missing = [root for root in roots if not store_exists(root)]
+    if missing:
+        parser.error(f"data directory not found: {', '.join(missing)}")
+    result = run_batch(roots, args.workers)
+    write_output(result, args.output)
+    print(f"Wrote {len(result)} rows for {len(roots)} project(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
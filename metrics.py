@@ -0,0 +1,264 @@
+"""Headless KPI and aggregation logic shared by the dashboard and batch jobs.
+
+Nothing here imports Streamlit. All functions work on plain pandas/NumPy data
+and are vectorized over departments: KPI inputs are arrays with one entry per
+department, and ``kpi_table`` computes every department's gauges in one pass.
+
+KPI definitions (as shown on the GRA-Overall gauges):
+
+* SPM  – earned / planned * 100
+* SV   – schedule variance, SPM - 100
+* CCPM – actual / forecast cost * 100 of the latest EAC record
+* CV   – cost variance in percent of budget from the EAC forecast
+  (``forecast.cost_forecast``) when there is one, otherwise a simulated
+  constant; gauges, history and batch output all take the same value
+* North Star – mean of SPM, 100 - |SV| and 100 - |CV|
+
+``KPIHistory`` computes the same KPIs for every date: at each date it uses
+the latest SPM/EAC record at or before that date, so appending a record only
+adds (or replaces) the history rows from its date onward. The CV is one
+value for all dates (the current forecast), like the simulated constant.
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+SPM_REF = 100
+SV_REF = 0
+CCPM_REF = 100
+CV_REF = 0
+NORTH_STAR_REF = 100
+KPI_REFERENCES = {"SPM": SPM_REF, "SV": SV_REF, "CCPM": CCPM_REF, "CV": CV_REF, "North Star KPI": NORTH_STAR_REF}
+
+# Simulated cost variance used by the CV gauge
+CV_SIMULATED = -10
+
+KPI_COLUMNS = ["SPM", "SV", "CCPM", "CV", "North Star KPI"]
+FLOW_COLUMNS = {
+    "CFD": ["Backlog", "In Progress", "Done"],
+    "BDC": ["Ideal", "Actual"],
+    "BUC": ["Total Scope", "Completed"],
+}
+
+
+# -------------------------------
+# KPI Formulas (vectorized)
+# -------------------------------
+def spm(planned, earned):
+    return np.round(np.asarray(earned, dtype=float) / np.asarray(planned, dtype=float) * 100, 2)
+
+
+def schedule_variance(spm_values):
+    return np.asarray(spm_values, dtype=float) - SPM_REF
+
+
+def ccpm(actual_cost, forecast_cost):
+    return np.round(np.asarray(actual_cost, dtype=float) / np.asarray(forecast_cost, dtype=float) * 100, 2)
+
+
+def cost_variance(n=None, cv_value=None):
+    # The given CV (e.g. from the cost forecast) or the simulated constant; one value or n copies
+    value = float(CV_SIMULATED if cv_value is None or np.isnan(cv_value) else cv_value)
+    return value if n is None else np.full(n, value)
+
+
+def north_star(spm_values, sv_values, cv_values):
+    spm_values = np.asarray(spm_values, dtype=float)
+    return np.round((spm_values + (100 - np.abs(sv_values)) + (100 - np.abs(cv_values))) / 3, 2)
+
+
+# -------------------------------
+# Frame Helpers
+# -------------------------------
+def sum_by_date(frames):
+    # Per-date sum over several date-indexed frames (e.g. all departments)
+    return pd.concat(frames).groupby("Date", as_index=False).sum()
+
+
+def long_frame(frames_by_dept):
+    # {dept: frame} -> one frame with a categorical Department column
+    parts = [df.assign(Department=dept) for dept, df in frames_by_dept.items() if df is not None and len(df)]
+    if not parts:
+        return None
+    combined = pd.concat(parts, ignore_index=True)
+    combined["Department"] = combined["Department"].astype("category")
+    return combined
+
+
+def latest_by_dept(frames_by_dept):
+    # One row per department holding its latest-dated values
+    combined = long_frame(frames_by_dept)
+    if combined is None:
+        return pd.DataFrame()
+    combined = combined.sort_values(["Department", "Date"], kind="stable")
+    return combined.groupby("Department", observed=True).tail(1).set_index("Department").drop(columns="Date")
+
+
+# -------------------------------
+# KPI Snapshots
+# -------------------------------
+def kpi_snapshot(spm_df, eac_df, cv_value=None):
+    # Gauge values for one project: SPM from the first SPM row, CCPM from the latest EAC record,
+    # CV as given (e.g. forecast) or simulated
+    spm_value = float(spm(spm_df["Planned"].iloc[0], spm_df["Earned"].iloc[0]))
+    sv_value = float(schedule_variance(spm_value))
+    last_row = eac_df.sort_values("Date", kind="stable").iloc[-1]
+    ccpm_value = float(ccpm(last_row["Actual Cost"], last_row["Forecast Cost"]))
+    cv_value = cost_variance(cv_value=cv_value)
+    return {
+        "SPM": spm_value,
+        "SV": sv_value,
+        "CCPM": ccpm_value,
+        "CV": cv_value,
+        "North Star KPI": float(north_star(spm_value, sv_value, cv_value)),
+    }
+
+
+def kpi_table(spm_by_dept, eac_by_dept, cv_by_dept=None):
+    # KPI snapshot for every department at once; departments missing SPM or EAC data get NaN.
+    # cv_by_dept: {dept: CV} (e.g. forecast); other departments get the simulated CV
+    depts = sorted(set(spm_by_dept) | set(eac_by_dept))
+    table = pd.DataFrame(index=pd.Index(depts, name="Department"))
+    spm_first = {dept: df.iloc[0] for dept, df in spm_by_dept.items() if df is not None and len(df)}
+    planned = np.array([spm_first[d]["Planned"] if d in spm_first else np.nan for d in depts], dtype=float)
+    earned = np.array([spm_first[d]["Earned"] if d in spm_first else np.nan for d in depts], dtype=float)
+    latest_eac = latest_by_dept(eac_by_dept).reindex(depts)
+    table["SPM"] = spm(planned, earned)
+    table["SV"] = schedule_variance(table["SPM"])
+    if len(latest_eac.columns):
+        table["CCPM"] = ccpm(latest_eac["Actual Cost"], latest_eac["Forecast Cost"])
+    else:
+        table["CCPM"] = np.nan
+    cv_by_dept = cv_by_dept or {}
+    table["CV"] = [cost_variance(cv_value=cv_by_dept.get(dept)) for dept in depts]
+    table["North Star KPI"] = north_star(table["SPM"], table["SV"], table["CV"])
+    return table
+
+
+# -------------------------------
+# KPI History
+# -------------------------------
+# One KPI input series: Date-sorted record dates, the KPI value of each record and per-record
+# content hashes. Undated inputs (the stored SPM record) have dates=None and a single value.
+_KPIInput = namedtuple("_KPIInput", ["dates", "values", "hashes"])
+
+# Marker for "every date changed" in KPIHistory.update
+_ALL_DATES = object()
+
+
+def _dated_input(df, formula):
+    if not df["Date"].is_monotonic_increasing:
+        df = df.sort_values("Date", kind="stable")
+    return _KPIInput(df["Date"].to_numpy(dtype="datetime64[ns]"), np.asarray(formula(df), dtype=float),
+                     pd.util.hash_pandas_object(df, index=False).to_numpy())
+
+
+def _spm_input(spm_df):
+    # Dated SPM data gives one SPM per record; otherwise the first record applies to every date
+    if "Date" in spm_df.columns:
+        return _dated_input(spm_df, lambda df: spm(df["Planned"], df["Earned"]))
+    value = spm(spm_df["Planned"].iloc[0], spm_df["Earned"].iloc[0])
+    return _KPIInput(None, np.array([value], dtype=float), None)
+
+
+def _eac_input(eac_df):
+    return _dated_input(eac_df, lambda df: ccpm(df["Actual Cost"], df["Forecast Cost"]))
+
+
+def _first_changed_date(old, new):
+    # Earliest date whose KPIs depend on records that differ between old and new (None: no change)
+    if old is None or (old.dates is None) != (new.dates is None):
+        return _ALL_DATES
+    if new.dates is None:
+        return None if np.array_equal(old.values, new.values, equal_nan=True) else _ALL_DATES
+    n_old = len(old.hashes)
+    if len(new.hashes) < n_old or not np.array_equal(new.hashes[:n_old], old.hashes):
+        return _ALL_DATES
+    return new.dates[n_old] if len(new.hashes) > n_old else None
+
+
+def _asof(source, at):
+    # Value of the latest record at or before each date in `at` (NaN before the first record)
+    if source.dates is None:
+        return np.full(len(at), source.values[0])
+    idx = np.searchsorted(source.dates, at, side="right") - 1
+    result = np.full(len(at), np.nan)
+    found = idx >= 0
+    result[found] = source.values[idx[found]]
+    return result
+
+
+def _history_rows(spm_source, eac_source, start=None, cv_value=None):
+    # KPI rows for every record date from `start` on (all dates if start is None)
+    dated = [source.dates for source in (spm_source, eac_source) if source.dates is not None]
+    if start is not None:
+        dated = [dates[np.searchsorted(dates, start, side="left"):] for dates in dated]
+    at = np.unique(np.concatenate(dated)) if dated else np.array([], dtype="datetime64[ns]")
+    spm_values = _asof(spm_source, at)
+    sv_values = schedule_variance(spm_values)
+    cv_values = cost_variance(len(at), cv_value)
+    return pd.DataFrame({
+        "Date": at,
+        "SPM": spm_values,
+        "SV": sv_values,
+        "CCPM": _asof(eac_source, at),
+        "CV": cv_values,
+        "North Star KPI": north_star(spm_values, sv_values, cv_values),
+    })
+
+
+def kpi_history(spm_df, eac_df, cv_value=None):
+    # Per-date KPI frame (Date + KPI_COLUMNS) for one project, computed from scratch
+    return _history_rows(_spm_input(spm_df), _eac_input(eac_df), cv_value=cv_value)
+
+
+class KPIHistory:
+    """Per-date KPI series for one project, extended incrementally.
+
+    ``update`` compares the new SPM/EAC inputs with the ones the history was
+    built from. When records were only appended (the old per-record hashes
+    are a prefix of the new ones), just the dates from the first new record
+    onward are recomputed; any other edit (or a new CV) rebuilds the whole
+    history.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._spm = None
+        self._eac = None
+        self._cv = None
+        self._frame = pd.DataFrame({"Date": np.array([], dtype="datetime64[ns]"),
+                                    **{col: np.array([], dtype=float) for col in KPI_COLUMNS}})
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        # Content key of the history: the fingerprint passed to the last update
+        return self._key
+
+    def update(self, fingerprint, load, cv_value=None):
+        # load() returns (spm_df, eac_df); it is only called when the fingerprint changed.
+        # The fingerprint must cover cv_value too.
+        with self._lock:
+            if self._key is not None and self._key == fingerprint:
+                return
+            spm_df, eac_df = load()
+            spm_source, eac_source = _spm_input(spm_df), _eac_input(eac_df)
+            cv_value = cost_variance(cv_value=cv_value)
+            changes = [_first_changed_date(self._spm, spm_source), _first_changed_date(self._eac, eac_source)]
+            if cv_value != self._cv or any(change is _ALL_DATES for change in changes):
+                self._frame = _history_rows(spm_source, eac_source, cv_value=cv_value)
+            else:
+                starts = [change for change in changes if change is not None]
+                if starts:
+                    start = min(starts)
+                    keep = self._frame.iloc[:np.searchsorted(self._frame["Date"].to_numpy(), start, side="left")]
+                    self._frame = pd.concat([keep, _history_rows(spm_source, eac_source, start, cv_value)],
+                                            ignore_index=True)
+            self._spm, self._eac, self._cv, self._key = spm_source, eac_source, cv_value, fingerprint
+
+    def frame(self):
+        with self._lock:
+            return self._frame
@@ -0,0 +1,214 @@
+"""Fingerprint-keyed caches for prepared chart frames and Plotly figures.
+
+Streamlit reruns the whole dashboard script on every interaction. The helpers
+here make sure that unchanged session-state frames come back from a bounded,
+process-wide LRU cache instead of being re-parsed and re-plotted each time.
+Cached frames and figures are shared between sessions and must be treated as
+read-only by callers.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from downsample import rollup_frame
+from profiling import stage
+
+
+# -------------------------------
+# Date Helpers
+# -------------------------------
+DATE_FORMAT = '%d.%m.%Y'
+DATE_DTYPE = "datetime64[ns]"
+
+# DD.MM.YYYY string -> datetime64 value, shared by all sessions; cleared when it grows too large
+_date_parse_cache = {}
+_DATE_PARSE_CACHE_SIZE = 200_000
+
+
+def parse_dates(values, errors="raise"):
+    # Parses each distinct value once: strings as DD.MM.YYYY, date/datetime objects as-is.
+    # Returns a datetime64[ns] Series aligned with the input; errors="coerce" yields NaT for bad values.
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype(DATE_DTYPE)
+    codes, uniques = pd.factorize(series)
+    resolved = {}
+    missing = []
+    for value in uniques:
+        cached = _date_parse_cache.get(value)
+        if cached is None:
+            missing.append(value)
+        else:
+            resolved[value] = cached
+    if missing:
+        if len(_date_parse_cache) + len(missing) > _DATE_PARSE_CACHE_SIZE:
+            _date_parse_cache.clear()
+        strings = [v for v in missing if isinstance(v, str)]
+        others = [v for v in missing if not isinstance(v, str)]
+        for batch, fmt in ((strings, DATE_FORMAT), (others, None)):
+            if batch:
+                parsed = pd.to_datetime(pd.Index(batch, dtype=object), format=fmt, errors=errors)
+                for value, stamp in zip(batch, parsed.to_numpy(DATE_DTYPE)):
+                    resolved[value] = stamp
+                    if not np.isnat(stamp):
+                        # Coerced failures are not cached, so a later strict parse still raises
+                        _date_parse_cache[value] = stamp
+    # Factorize codes missing values as -1, which picks the trailing NaT
+    lookup = np.array([resolved[v] for v in uniques] + [np.datetime64("NaT")], dtype=DATE_DTYPE)
+    return pd.Series(lookup[codes], index=series.index, name=series.name)
+
+
+def convert_date(date_series):
+    # Native datetime64 columns pass through; DD.MM.YYYY strings are parsed via the shared cache
+    return parse_dates(date_series)
+
+
+def with_native_dates(df):
+    # Frame with its Date column (if any) as datetime64[ns]; returns df itself when already native
+    if "Date" not in df.columns or df["Date"].dtype == DATE_DTYPE:
+        return df
+    return df.assign(Date=convert_date(df["Date"]))
+
+
+# -------------------------------
+# Bounded LRU Cache
+# -------------------------------
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            # Computed outside the lock so a slow build does not block other sessions
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# -------------------------------
+# Frame Fingerprints
+# -------------------------------
+def frame_fingerprint(df):
+    # Cheap content hash: column layout, dtypes and per-row value hashes. Deliberately not keyed by an
+    # edit version, so a frame edited back to earlier content hits the cache again.
+    with stage("fingerprint"):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        return digest.hexdigest()
+
+
+# -------------------------------
+# Cached Preparation and Figure Building
+# -------------------------------
+prepared_cache = LRUCache(maxsize=256)
+rollup_cache = LRUCache(maxsize=256)
+figure_cache = LRUCache(maxsize=256)
+# Forecasts are keyed by the fingerprints of every frame they use, so each dataset version is forecast once
+forecast_cache = LRUCache(maxsize=32)
+
+
+def clear_caches():
+    # Drops every process-wide cache in this module (used for cold-path timings)
+    prepared_cache.clear()
+    rollup_cache.clear()
+    figure_cache.clear()
+    forecast_cache.clear()
+    _date_parse_cache.clear()
+
+
+def _prepare_chart_frame(df):
+    # No defensive copy: with pandas copy-on-write the result is a view of df when df already has
+    # native, sorted dates, and writes to either frame never reach the other
+    with stage("prepare"):
+        with stage("convert_date"):
+            prepared = with_native_dates(df)
+        if not prepared["Date"].is_monotonic_increasing:
+            prepared = prepared.sort_values("Date")
+        return prepared.reset_index(drop=True)
+
+
+def prepare_chart_frame(df, fingerprint=None):
+    # Date-converted, date-sorted chart frame (shared and read-only, like its source)
+    if fingerprint is None:
+        fingerprint = frame_fingerprint(df)
+    return prepared_cache.get_or_compute(("prepared", fingerprint),
+                                         lambda: _prepare_chart_frame(df))
+
+
+def rolled_up_frame(df, key, granularity):
+    # Period-end rows of a prepared frame, computed once per (content key, granularity) and shared;
+    # chart builders then only slice the (much shorter) rollup by date
+    if granularity is None:
+        return df
+    with stage("rollup"):
+        return rollup_cache.get_or_compute(("rollup", key, granularity), lambda: rollup_frame(df, granularity))
+
+
+def cached_figure(builder, key, make_args):
+    # Builds builder(*make_args()) once per (builder, key) and reuses it afterwards
+    def build():
+        with stage("build"):
+            return builder(*make_args())
+    return figure_cache.get_or_compute((builder.__name__,) + tuple(key), build)
+
+
+def chart_figure(builder, df, *args, fingerprint=None, granularity=None):
+    # Figure for a single frame, keyed by its content fingerprint (computed here if not given)
+    if fingerprint is None:
+        fingerprint = frame_fingerprint(df)
+    return cached_figure(builder, (fingerprint,) + args,
+                         lambda: (rolled_up_frame(prepare_chart_frame(df, fingerprint), fingerprint, granularity),)
+                         + args)
+
+
+def aggregate_chart_figure(builder, aggregate, sources, *args, fingerprints=None, granularity=None):
+    # Figure for the running per-date sum of several frames (an aggregation.DateAggregate);
+    # only sources whose fingerprint changed are folded into the aggregate again, and sources that
+    # are no longer passed are dropped from it
+    with stage("aggregate"):
+        updates = []
+        for name, df in sources.items():
+            fingerprint = fingerprints[name] if fingerprints is not None else frame_fingerprint(df)
+            updates.append((name, fingerprint,
+                            lambda df=df, fingerprint=fingerprint: prepare_chart_frame(df, fingerprint)))
+        aggregate.update_many(updates)
+        aggregate.prune(sources)
+    return cached_figure(builder, aggregate.key + args,
+                         lambda: (rolled_up_frame(aggregate.frame(), aggregate.key, granularity),) + args)
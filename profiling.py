@@ -0,0 +1,135 @@
+"""Opt-in timing of dashboard reruns.
+
+``profile_run`` activates a ``RunProfile`` for the current script run.
+Pipeline code marks its work with ``stage("name")`` and the dashboard wraps
+each chart section in ``section("CFD")``; both are no-ops when no run is
+active, so instrumentation costs nothing while profiling is switched off.
+
+Stages nest: a ``convert_date`` inside ``prepare`` inside ``aggregate`` is
+recorded as ``aggregate/prepare/convert_date`` with its own inclusive time.
+Cache hit/miss counts are the per-section deltas of the process-wide
+``LRUCache`` counters, so activity from other sessions running at the same
+time is included.
+"""
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("dashboard_profile", default=None)
+
+
+class RunProfile:
+    """Stage timings, payload sizes and cache counters of one rerun."""
+
+    def __init__(self, label, caches=None):
+        self.label = label
+        self.started_at = time.time()
+        self.duration = None
+        self.events = []
+        self.cache_events = []
+        self._caches = dict(caches or {})
+        self._section = None
+        self._stages = []
+
+    def add(self, stage, seconds, nbytes=None):
+        event = {"section": self._section, "stage": stage, "ms": round(seconds * 1000, 3)}
+        if nbytes is not None:
+            event["bytes"] = nbytes
+        self.events.append(event)
+
+    def _cache_counts(self):
+        return {name: (cache.hits, cache.misses) for name, cache in self._caches.items()}
+
+    @contextmanager
+    def section(self, name):
+        outer, self._section = self._section, name
+        before = self._cache_counts()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add("total", time.perf_counter() - started)
+            for cache, (hits, misses) in self._cache_counts().items():
+                self.cache_events.append({"section": name, "cache": cache,
+                                          "hits": hits - before[cache][0],
+                                          "misses": misses - before[cache][1]})
+            self._section = outer
+
+    def summary(self):
+        # One row per (section, stage): number of calls, total milliseconds and bytes
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault((event["section"], event["stage"]),
+                                  {"section": event["section"], "stage": event["stage"],
+                                   "calls": 0, "ms": 0.0, "bytes": 0})
+            row["calls"] += 1
+            row["ms"] = round(row["ms"] + event["ms"], 3)
+            row["bytes"] += event.get("bytes", 0)
+        return list(rows.values())
+
+    def to_dict(self):
+        return {"label": self.label, "started_at": self.started_at,
+                "ms": None if self.duration is None else round(self.duration * 1000, 3),
+                "events": self.events, "caches": self.cache_events}
+
+
+@contextmanager
+def profile_run(label, caches=None):
+    # Activates a RunProfile for the code inside the block
+    profile = RunProfile(label, caches)
+    token = _current.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.duration = time.perf_counter() - started
+        _current.reset(token)
+
+
+def active():
+    return _current.get()
+
+
+@contextmanager
+def section(name):
+    profile = _current.get()
+    if profile is None:
+        yield None
+    else:
+        with profile.section(name):
+            yield profile
+
+
+@contextmanager
+def stage(name):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile._stages.append(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        path = "/".join(profile._stages)
+        profile._stages.pop()
+        profile.add(path, time.perf_counter() - started)
+
+
+def record_payload(stage_name, nbytes, seconds=0.0):
+    # Payload size sent to the browser (e.g. one st.plotly_chart spec)
+    profile = _current.get()
+    if profile is not None:
+        profile.add(stage_name, seconds, nbytes)
+
+
+def dumps_log(profiles):
+    # JSON export of several runs (RunProfile objects or their dicts)
+    return json.dumps([p.to_dict() if isinstance(p, RunProfile) else p for p in profiles], indent=2)
+
+
+def append_log_file(profile, path):
+    # Appends one run as a JSON line
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(profile.to_dict()) + "\n")
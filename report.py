@@ -0,0 +1,209 @@
+"""Static HTML report of the GRA-Overall and department dashboards.
+
+The report uses the same figure builders (``charts``), KPI formulas
+(``metrics``) and forecasts (``forecast``) as the live app, so both always
+show the same charts. Each section (Overall, then one per department) is
+built and serialized in a worker process; the page embeds plotly.js once and
+every figure div uses that copy. With ``image_format`` set, every figure is also written as a
+static image (PNG, SVG or PDF), which needs the optional ``kaleido`` package.
+
+Usage::
+
+    python report.py --data-dir data --output report.html --images report_images --workers 8
+"""
+import argparse
+import html
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from plotly.offline import get_plotlyjs
+
+from charts import (DEFAULT_OPTIONS, OVERALL_SCOPE_COLOR, build_bdc_figure, build_buc_figure,
+                    build_cfd_figure, build_eac_figure, build_gauge_figure, build_kpi_trend_figure, chart_title)
+from departments import load_departments
+from forecast import project_forecast
+from metrics import FLOW_COLUMNS, KPI_COLUMNS, KPI_REFERENCES, kpi_history, kpi_snapshot, sum_by_date
+from pipeline import prepare_chart_frame
+from schema import DEPARTMENT_KINDS
+from store import DEFAULT_STORE_PATH, GLOBAL_PARTITION, open_store, store_exists
+
+IMAGE_FORMATS = ("png", "svg", "pdf")
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script type="text/javascript">{plotlyjs}</script>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+.row {{ display: flex; gap: 1em; }}
+.row > div {{ flex: 1; min-width: 0; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Generated {generated}</p>
+{sections}
+</body>
+</html>
+"""
+
+
+# -------------------------------
+# Figures per Section
+# -------------------------------
+def _flow_figure(kind, df, title, scope_color, options, projection=None):
+    if kind == "CFD":
+        return build_cfd_figure(df, title, options)
+    if kind == "BDC":
+        return build_bdc_figure(df, title, options, projection)
+    return build_buc_figure(df, title, scope_color, options, projection)
+
+
+def overall_rows(frames, registry, options=DEFAULT_OPTIONS):
+    # Rows of figures for the GRA-Overall section: gauges, KPI trends, then one chart per row
+    rows = []
+    spm_df = frames.get(("SPM", GLOBAL_PARTITION))
+    eac_df = frames.get(("EAC", GLOBAL_PARTITION))
+    if eac_df is not None:
+        eac_df = prepare_chart_frame(eac_df)
+    # Same forecast inputs as the app: frames by department name plus the Overall sums
+    by_name = {kind: {registry.by_key(dept).name: prepare_chart_frame(frames[(kind, dept)])
+                      for dept in registry.keys() if (kind, dept) in frames}
+               for kind in DEPARTMENT_KINDS}
+    overall = {}
+    for kind in DEPARTMENT_KINDS:
+        columns = FLOW_COLUMNS[kind]
+        if by_name[kind]:
+            overall[kind] = sum_by_date([df[["Date"] + columns] for df in by_name[kind].values()])
+            by_name[kind][registry.overall_title] = overall[kind]
+    result = project_forecast(by_name["CFD"], by_name["BDC"], by_name["BUC"], eac_df, registry.overall_title)
+    if spm_df is not None and eac_df is not None:
+        kpis = kpi_snapshot(spm_df, eac_df, cv_value=result.cost["CV"] if result.cost else None)
+        history = kpi_history(spm_df, eac_df, cv_value=kpis["CV"])
+        rows.append([build_gauge_figure(kpi, kpis[kpi], KPI_REFERENCES[kpi]) for kpi in KPI_COLUMNS])
+        rows.append([build_kpi_trend_figure(history, kpi, KPI_REFERENCES[kpi], options) for kpi in KPI_COLUMNS])
+    for kind, df in overall.items():
+        rows.append([_flow_figure(kind, df, chart_title(registry.overall_title, kind), OVERALL_SCOPE_COLOR, options,
+                                  result.projections.get((kind, registry.overall_title)))])
+    if eac_df is not None:
+        rows.append([build_eac_figure(eac_df, chart_title(registry.overall_title, "EAC"), options,
+                                      result.projections.get(("EAC", registry.overall_title)))])
+    return rows
+
+
+def dept_rows(frames, dept, options=DEFAULT_OPTIONS):
+    prepared = {kind: prepare_chart_frame(frames[(kind, dept.key)])
+                for kind in DEPARTMENT_KINDS if (kind, dept.key) in frames}
+    # Trend projections only depend on the department's own frames
+    result = project_forecast({}, {dept.name: prepared["BDC"]} if "BDC" in prepared else {},
+                              {dept.name: prepared["BUC"]} if "BUC" in prepared else {}, None, dept.name)
+    return [[_flow_figure(kind, df, chart_title(dept.name, kind), dept.color, options,
+                          result.projections.get((kind, dept.name)))]
+            for kind, df in prepared.items()]
+
+
+# -------------------------------
+# Rendering
+# -------------------------------
+def _render_section(slug, heading, rows, image_dir, image_format):
+    # Runs in a worker: serializes one section's figures to HTML divs (and images)
+    parts = [f'<section id="{slug}">', f"<h2>{html.escape(heading)}</h2>"]
+    for row_no, row in enumerate(rows):
+        divs = []
+        for fig_no, fig in enumerate(row):
+            name = f"{slug}-{row_no}-{fig_no}"
+            divs.append(fig.to_html(full_html=False, include_plotlyjs=False, div_id=name))
+            if image_dir is not None:
+                fig.write_image(Path(image_dir) / f"{name}.{image_format}")
+        parts.append('<div class="row">' + "".join(f"<div>{div}</div>" for div in divs) + "</div>")
+    parts.append("</section>")
+    return "\n".join(parts)
+
+
+def _overall_task(frames, registry, options, image_dir, image_format):
+    return _render_section("overall", f"{registry.overall_title} – Aggregated Charts and Metrics",
+                           overall_rows(frames, registry, options), image_dir, image_format)
+
+
+def _dept_task(frames, dept, options, image_dir, image_format):
+    return _render_section(f"dept-{dept.key}", f"{dept.name} – Charts and Metrics",
+                           dept_rows(frames, dept, options), image_dir, image_format)
+
+
+def build_report(frames, registry, options=DEFAULT_OPTIONS, workers=None, image_dir=None, image_format="png"):
+    """Self-contained HTML report for ``frames`` ({(kind, partition): frame}).
+
+    ``workers=1`` renders in the calling process (used from the Streamlit
+    app); otherwise sections are rendered on a process pool.
+    """
+    if image_dir is not None:
+        if importlib.util.find_spec("kaleido") is None:
+            raise RuntimeError("Static image export needs the kaleido package (pip install kaleido)")
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format {image_format!r}; use one of {', '.join(IMAGE_FORMATS)}")
+        Path(image_dir).mkdir(parents=True, exist_ok=True)
+    # Each worker only receives the frames its section needs
+    tasks = [(_overall_task, frames, registry)]
+    for dept in registry:
+        dept_frames = {key: df for key, df in frames.items() if key[1] == dept.key}
+        if dept_frames:
+            tasks.append((_dept_task, dept_frames, dept))
+    if workers == 1:
+        sections = [task(task_frames, target, options, image_dir, image_format)
+                    for task, task_frames, target in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(task, task_frames, target, options, image_dir, image_format)
+                       for task, task_frames, target in tasks]
+            sections = [future.result() for future in futures]
+    return PAGE_TEMPLATE.format(title=html.escape(f"{registry.overall_title} Report"),
+                                plotlyjs=get_plotlyjs(),
+                                generated=datetime.now().strftime("%d.%m.%Y %H:%M"),
+                                sections="\n".join(sections))
+
+
+def load_store_frames(store, registry):
+    # Every stored frame the report shows; departments or kinds without data are left out
+    keys = [(kind, GLOBAL_PARTITION) for kind in ("EAC", "SPM")]
+    keys += [(kind, dept) for dept in registry.keys() for kind in DEPARTMENT_KINDS]
+    frames = {}
+    for kind, partition in keys:
+        df = store.read(kind, partition)
+        if df is not None and len(df):
+            frames[(kind, partition)] = df
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the dashboard charts as a static HTML report.")
+    parser.add_argument("--data-dir", default=os.environ.get("DASHBOARD_DATA_DIR", str(DEFAULT_STORE_PATH)),
+                        help="data store root or sqlite:<path> (default: DASHBOARD_DATA_DIR or ./data)")
+    parser.add_argument("--departments", help="department registry TOML (default: DASHBOARD_DEPARTMENTS)")
+    parser.add_argument("--output", default="report.html", help="HTML file to write")
+    parser.add_argument("--images", help="also write every figure as a static image into this directory")
+    parser.add_argument("--image-format", choices=IMAGE_FORMATS, default="png")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if not store_exists(args.data_dir):
+        parser.error(f"data directory not found: {args.data_dir}")
+    registry = load_departments(args.departments)
+    frames = load_store_frames(open_store(args.data_dir), registry)
+    try:
+        report = build_report(frames, registry, workers=args.workers,
+                              image_dir=args.images, image_format=args.image_format)
+    except RuntimeError as e:
+        parser.error(str(e))
+    Path(args.output).write_text(report, encoding="utf-8")
+    print(f"Wrote report with {len(frames)} datasets to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
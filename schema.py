@@ -0,0 +1,56 @@
+"""Column schemas and compact in-memory dtypes for the chart datasets.
+
+Every chart type is held with native ``datetime64[ns]`` dates, ``int32``
+counts (CFD) and ``float32`` values (BDC, BUC, SPM); department keys in
+long-format frames are categorical. That is half the memory of the default
+int64/float64 columns, and because pandas copy-on-write is on, frames can be
+shared and sliced as views without defensive copies. EAC costs stay
+``float64``: float32 is exact only up to about 16.7 million and already
+shows cent-level artifacts on ordinary budgets.
+"""
+import numpy as np
+import pandas as pd
+
+from pipeline import with_native_dates
+
+SCHEMAS = {
+    "CFD": {"Backlog": "int32", "In Progress": "int32", "Done": "int32"},
+    "BDC": {"Ideal": "float32", "Actual": "float32"},
+    "BUC": {"Total Scope": "float32", "Completed": "float32"},
+    "EAC": {"Actual Cost": "float64", "Forecast Cost": "float64"},
+    "SPM": {"Planned": "float32", "Earned": "float32"},
+}
+DATED_KINDS = {"CFD", "BDC", "BUC", "EAC"}
+# Kinds kept per department, in the order their charts are shown
+DEPARTMENT_KINDS = ("CFD", "BDC", "BUC")
+DEPARTMENT_COLUMN = "Department"
+
+
+def fits_dtype(values, dtype):
+    # Whether numeric values convert to dtype without losing anything that matters
+    if not np.issubdtype(dtype, np.integer):
+        return True
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if not np.isfinite(values).all() or (values != np.round(values)).any():
+        return False
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_frame(kind, df):
+    # Frame with native dates and the kind's compact dtypes; returns df itself when nothing changes.
+    # Columns that would not convert cleanly (e.g. NaN in a count column) are left for validation to report.
+    df = with_native_dates(df)
+    casts = {}
+    for col, dtype in SCHEMAS.get(kind, {}).items():
+        if col not in df.columns or df[col].dtype == dtype or not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if fits_dtype(df[col], np.dtype(dtype)):
+            casts[col] = dtype
+    if DEPARTMENT_COLUMN in df.columns and not isinstance(df[DEPARTMENT_COLUMN].dtype, pd.CategoricalDtype):
+        casts[DEPARTMENT_COLUMN] = "category"
+    return df.astype(casts) if casts else df
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
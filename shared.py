@@ -0,0 +1,160 @@
+"""Process-wide, versioned datasets shared by all dashboard sessions.
+
+Every chart frame (``(kind, partition)``, e.g. ``("CFD", "Gov")``) exists
+once per server process instead of once per browser session. Frames are
+loaded lazily from the columnar store (or generated demo data), and the
+Overall aggregates and KPI history built from them are shared too, so each
+change is folded in once no matter how many sessions are open.
+
+Frames are stored with the compact dtypes from ``schema``. Edits are
+copy-on-write: ``commit`` persists the new frame, swaps it in as a
+new version and leaves the old object untouched for anyone still holding it.
+Frames handed out are shared and must never be modified in place. Each
+commit bumps ``version``; sessions compare it with the version they last
+rendered to know when to refresh, and ``subscribe`` registers callbacks for
+code outside Streamlit.
+
+With a store that can aggregate itself (the SQLite backend), ``overall``
+returns the per-date sums computed by the store's query instead of the
+in-memory aggregates, so Overall pages never load every department.
+"""
+import threading
+from collections import namedtuple
+
+from aggregation import DateAggregate
+from metrics import FLOW_COLUMNS, KPIHistory, sum_by_date
+from pipeline import LRUCache, frame_fingerprint
+from profiling import stage
+from schema import compact_frame, frame_nbytes
+from store import GLOBAL_PARTITION
+
+# One dataset version: the shared frame, its content fingerprint and the global version it was set at
+Dataset = namedtuple("Dataset", ["frame", "fingerprint", "version"])
+
+
+class SharedDatasets:
+    """Versioned frames keyed by (kind, partition), plus aggregates derived from them."""
+
+    def __init__(self, store, defaults):
+        # defaults: {kind: callable(partition) returning demo data for partitions with nothing stored}
+        self._store = store
+        self._defaults = dict(defaults)
+        self._entries = {}
+        self._version = 0
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._aggregates = {kind: DateAggregate(columns) for kind, columns in FLOW_COLUMNS.items()}
+        self._kpi_history = KPIHistory()
+        self._overall = LRUCache(maxsize=32)
+
+    @property
+    def version(self):
+        # Bumped on every commit or reload; cheap to poll
+        return self._version
+
+    def dataset(self, kind, partition=GLOBAL_PARTITION):
+        key = (kind, partition)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    with stage("load"):
+                        stored = self._store.read(kind, partition)
+                        frame = compact_frame(kind, stored if stored is not None else self._defaults[kind](partition))
+                        entry = Dataset(frame, frame_fingerprint(frame), self._version)
+                    self._entries[key] = entry
+        return entry
+
+    def get(self, kind, partition=GLOBAL_PARTITION):
+        return self.dataset(kind, partition).frame
+
+    def stored(self, kind, partition=GLOBAL_PARTITION):
+        # Current frame if the partition has been persisted, None while it only holds demo data
+        if self._store.read(kind, partition) is None:
+            return None
+        return self.get(kind, partition)
+
+    def commit(self, kind, partition, frame):
+        # Persists and publishes a new version; raises ValueError/TypeError if the store rejects it
+        frame = compact_frame(kind, frame)
+        with self._lock:
+            self._store.write(kind, partition, frame)
+            self._version += 1
+            entry = Dataset(frame, frame_fingerprint(frame), self._version)
+            self._entries[(kind, partition)] = entry
+        self._notify(kind, partition, entry.version)
+        return entry
+
+    def reload(self, kind, partition=GLOBAL_PARTITION):
+        # Drops the in-memory version so the next access reads the store again (e.g. after an import)
+        with self._lock:
+            self._entries.pop((kind, partition), None)
+            self._version += 1
+            version = self._version
+        self._notify(kind, partition, version)
+
+    def nbytes(self):
+        # Memory held by the current version of every loaded frame
+        return sum(frame_nbytes(entry.frame) for entry in list(self._entries.values()))
+
+    def aggregate(self, kind):
+        # Shared running per-date sum over all departments' frames of this kind
+        return self._aggregates[kind]
+
+    @property
+    def pushdown(self):
+        # Whether the store computes per-date sums itself (see overall)
+        return hasattr(self._store, "sum_by_date")
+
+    def overall(self, kind, partitions):
+        # Dataset of the per-date sum across partitions, keyed by the partitions' store versions.
+        # Partitions that only hold demo data are not in the store and are added in pandas.
+        stored, demo = [], []
+        for partition in partitions:
+            version = self._store.version(kind, partition)
+            if version is None:
+                demo.append(self.dataset(kind, partition))
+            else:
+                stored.append((partition, version))
+        key = ("overall", kind, tuple(stored), tuple(entry.fingerprint for entry in demo))
+
+        def load():
+            with stage("load"):
+                frame = self._store.sum_by_date(kind, [partition for partition, _ in stored])
+                if demo:
+                    columns = ["Date"] + FLOW_COLUMNS[kind]
+                    frame = compact_frame(kind, sum_by_date([frame] + [entry.frame[columns] for entry in demo]))
+                return Dataset(frame, key, self._version)
+        return self._overall.get_or_compute(key, load)
+
+    def kpi_history(self):
+        return self._kpi_history
+
+    def subscribe(self, callback):
+        # callback(kind, partition, version) after each change; returns an unsubscribe function
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def _notify(self, kind, partition, version):
+        for callback in list(self._listeners):
+            callback(kind, partition, version)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_datasets(store, defaults):
+    # Process-wide instance; the first caller's store and defaults are used
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedDatasets(store, defaults)
+        return _shared
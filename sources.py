@@ -0,0 +1,237 @@
+"""Background refresh of the shared datasets from external data sources.
+
+A source has an async ``fetch()`` that returns new or changed rows as
+``{kind: frame}``, typed like an import (CFD/BDC/BUC rows carry a
+``Department`` column). ``BackgroundRefresher`` polls every source on an
+asyncio loop in a daemon thread, upserts the rows into the current shared
+frames by date and commits only the partitions that actually changed. The
+Overall aggregates fold in just those rows, and open sessions pick up the new
+version through their dataset watcher. A rerun never waits for a fetch; it
+renders the last committed version until the next one is swapped in.
+
+Two stand-ins for the real ticketing/cost systems are included:
+``FileSource`` (a workbook, CSV file or CSV directory, see ``ingest``) and
+``SQLiteSource`` (one table per chart type, read incrementally by rowid).
+Sources are configured with ``DASHBOARD_SOURCES``, a comma-separated list
+such as ``file:/srv/export.xlsx,sqlite:/srv/tickets.db``.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from ingest import IngestError, load_path, partition_frames, read_sql_rows
+from schema import DATED_KINDS, SCHEMAS
+from store import GLOBAL_PARTITION
+
+DEFAULT_REFRESH_SECONDS = 30
+
+
+# -------------------------------
+# Sources
+# -------------------------------
+class DataSource:
+    """Interface of a refresh source."""
+
+    name = "source"
+
+    async def fetch(self):
+        # {kind: typed frame} of rows that are new or changed since the last acknowledged fetch
+        raise NotImplementedError
+
+    def acknowledge(self):
+        # Called once the rows of the last fetch have been committed; incremental sources advance here
+        pass
+
+
+class FileSource(DataSource):
+    """Workbook, CSV file or CSV directory; returns its rows whenever the file changes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = f"file:{self.path}"
+        self._seen = None
+        self._pending = None
+
+    async def fetch(self):
+        # load_path is cached by mtime/size, so an unchanged file returns the same object
+        frames = await asyncio.to_thread(load_path, self.path)
+        self._pending = frames
+        return {} if frames is self._seen else frames
+
+    def acknowledge(self):
+        self._seen = self._pending
+
+
+class SQLiteSource(DataSource):
+    """SQLite database with one table per chart type; only rows added since the last fetch are read."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = f"sqlite:{self.path}"
+        self._rowids = {}
+        self._pending = {}
+
+    def _read(self):
+        with sqlite3.connect(self.path) as connection:
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            frames = {}
+            for kind in SCHEMAS:
+                if kind in tables:
+                    rows, self._pending[kind] = read_sql_rows(connection, kind, self._rowids.get(kind, 0))
+                    frames.update(rows)
+        return frames
+
+    async def fetch(self):
+        return await asyncio.to_thread(self._read)
+
+    def acknowledge(self):
+        self._rowids.update(self._pending)
+
+
+def sources_from_spec(spec):
+    # Sources for a DASHBOARD_SOURCES value; raises ValueError on an unknown scheme
+    sources = []
+    for entry in filter(None, (part.strip() for part in (spec or "").split(","))):
+        scheme, _, path = entry.partition(":")
+        if scheme == "file":
+            sources.append(FileSource(path))
+        elif scheme == "sqlite":
+            sources.append(SQLiteSource(path))
+        else:
+            raise ValueError(f"Unknown data source {entry!r}; use file:<path> or sqlite:<path>")
+    return sources
+
+
+# -------------------------------
+# Merging into the Shared Datasets
+# -------------------------------
+def merge_rows(kind, current, rows):
+    # Current frame with rows upserted by date (SPM is replaced); None if nothing changes
+    if kind in DATED_KINDS and current is not None and "Date" in current.columns:
+        columns = ["Date"] + list(SCHEMAS[kind])
+        merged = pd.concat([current[columns], rows[columns]], ignore_index=True)
+        merged = merged.drop_duplicates("Date", keep="last").sort_values("Date", kind="stable")
+        merged = merged.reset_index(drop=True)
+    else:
+        merged = rows.reset_index(drop=True)
+    if current is not None and merged.equals(current):
+        return None
+    return merged
+
+
+class BackgroundRefresher:
+    """Polls sources on an asyncio loop in a daemon thread and commits their rows."""
+
+    def __init__(self, datasets, sources, interval=DEFAULT_REFRESH_SECONDS, known_partitions=None):
+        self.datasets = datasets
+        self.sources = list(sources)
+        self.interval = interval
+        self.known_partitions = None if known_partitions is None else set(known_partitions)
+        self._status = {source.name: {"source": source.name, "last_success": None, "last_error": None,
+                                      "rows": 0, "commits": 0}
+                        for source in self.sources}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+
+    def status(self):
+        # One row per source: when it last succeeded, the last error and how much it has delivered
+        return [dict(row) for row in self._status.values()]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dashboard-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        try:
+            self._loop.run_until_complete(self._poll())
+        finally:
+            self._loop.close()
+
+    async def _poll(self):
+        while not self._stop.is_set():
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                # Never let one bad round end the thread; the next round retries every source
+                for status in self._status.values():
+                    status["last_error"] = _error_text(e)
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh_once(self):
+        # Fetches all sources concurrently; a failing source is reported and retried next time
+        results = await asyncio.gather(*(source.fetch() for source in self.sources), return_exceptions=True)
+        for source, result in zip(self.sources, results):
+            status = self._status[source.name]
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                rows, commits = await asyncio.to_thread(self._apply, result)
+                source.acknowledge()
+            except Exception as e:
+                # Any failure (also e.g. zipfile.BadZipFile from a half-written workbook) stays with its source
+                status["last_error"] = _error_text(e)
+                continue
+            status["last_success"] = time.strftime("%H:%M:%S")
+            status["rows"] += rows
+            status["commits"] += commits
+
+    def _apply(self, frames):
+        # Commits every changed partition; returns (rows received, partitions committed)
+        parts = list(partition_frames(frames, None))
+        for kind, partition, _ in parts:
+            if partition is None:
+                raise IngestError(f"{kind}: rows from a data source need a Department column")
+            if (self.known_partitions is not None and partition != GLOBAL_PARTITION
+                    and partition not in self.known_partitions):
+                raise IngestError(f"{kind}: unknown department {partition!r}")
+        rows = commits = 0
+        for kind, partition, df in parts:
+            rows += len(df)
+            merged = merge_rows(kind, self.datasets.stored(kind, partition), df)
+            if merged is not None:
+                self.datasets.commit(kind, partition, merged)
+                commits += 1
+        return rows, commits
+
+
+def _error_text(error):
+    # Status text of a failed fetch; unexpected exception types are named so the cause is visible
+    message = str(error) if isinstance(error, IngestError) else f"{type(error).__name__}: {error}"
+    return f"{time.strftime('%H:%M:%S')} {message}"
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_refresher(datasets, known_partitions=None):
+    # Process-wide refresher for DASHBOARD_SOURCES, started on first use; None when no sources are set
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            sources = sources_from_spec(os.environ.get("DASHBOARD_SOURCES"))
+            if not sources:
+                return None
+            interval = float(os.environ.get("DASHBOARD_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+            _refresher = BackgroundRefresher(datasets, sources, interval, known_partitions).start()
+        return _refresher
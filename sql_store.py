@@ -0,0 +1,168 @@
+"""SQLite data store, an alternative backend to the Parquet ``ColumnarStore``.
+
+Each chart type is one table with a ``department`` column and an index on
+``(department, Date)``, so reading one department is an index range scan and
+a project can hold years of history for any number of departments without
+loading all of it. ``sum_by_date`` runs the Overall aggregation
+(``groupby("Date").sum()``) inside SQLite and only the per-date result is
+pulled into pandas.
+
+Dates are stored as int64 nanoseconds. A ``_versions`` table counts writes
+per partition; reads are cached per process keyed by that version, which is
+the SQL counterpart of the Parquet store's mtime/size key. Connections come
+from a small pool shared by all sessions, and WAL mode lets readers keep
+going while a write commits. Select this backend with
+``DASHBOARD_DATA_DIR=sqlite:<path>``.
+"""
+import queue
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline import LRUCache, with_native_dates
+from schema import DATED_KINDS, SCHEMAS, compact_frame
+
+VERSIONS_TABLE = "_versions"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _columns(kind):
+    return (["Date"] if kind in DATED_KINDS else []) + list(SCHEMAS[kind])
+
+
+class SQLiteStore:
+    """One SQLite table per chart type, partitioned by a ``department`` column."""
+
+    def __init__(self, path, cache_size=512, pool_size=4):
+        self.path = Path(path)
+        self._cache = LRUCache(maxsize=cache_size)
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        with self._connection() as connection:
+            self._create_tables(connection)
+
+    @property
+    def cache(self):
+        # Partition cache, exposed for hit/miss statistics
+        return self._cache
+
+    @contextmanager
+    def _connection(self):
+        # Borrows a pooled connection; at most pool_size idle connections are kept
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield connection
+        finally:
+            if self._pool.qsize() < self._pool_size:
+                self._pool.put(connection)
+            else:
+                connection.close()
+
+    def _create_tables(self, connection):
+        with connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} "
+                               "(kind TEXT NOT NULL, department TEXT NOT NULL, version INTEGER NOT NULL, "
+                               "PRIMARY KEY (kind, department))")
+            for kind, schema in SCHEMAS.items():
+                columns = ["department TEXT NOT NULL"]
+                if kind in DATED_KINDS:
+                    columns.append('"Date" INTEGER NOT NULL')
+                columns += [f"{_quote(col)} {'INTEGER' if dtype.startswith('int') else 'REAL'} NOT NULL"
+                            for col, dtype in schema.items()]
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {_quote(kind)} ({', '.join(columns)})")
+                indexed = "department, \"Date\"" if kind in DATED_KINDS else "department"
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {_quote(kind + '_department_date')} "
+                                   f"ON {_quote(kind)} ({indexed})")
+
+    def _frame(self, kind, rows):
+        # Rows read back from SQL -> frame with native dates and the kind's compact dtypes
+        if "Date" in rows.columns:
+            rows["Date"] = pd.to_datetime(rows["Date"].to_numpy(np.int64), unit="ns")
+        if rows.empty:
+            # No rows: read_sql_query cannot infer the column types and returns object columns
+            rows = rows.astype({col: dtype for col, dtype in SCHEMAS[kind].items() if col in rows.columns})
+        return compact_frame(kind, rows)
+
+    def version(self, kind, partition):
+        # Write counter of the partition, or None if it has never been written
+        with self._connection() as connection:
+            row = connection.execute(f"SELECT version FROM {VERSIONS_TABLE} WHERE kind = ? AND department = ?",
+                                     (kind, partition)).fetchone()
+        return None if row is None else row[0]
+
+    def partitions(self, kind):
+        with self._connection() as connection:
+            rows = connection.execute(f"SELECT department FROM {VERSIONS_TABLE} WHERE kind = ? ORDER BY department",
+                                      (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def read(self, kind, partition):
+        # Shared, read-only frame for the partition, or None if it has never been written
+        version = self.version(kind, partition)
+        if version is None:
+            return None
+
+        def load():
+            columns = ", ".join(_quote(col) for col in _columns(kind))
+            with self._connection() as connection:
+                rows = pd.read_sql_query(f"SELECT {columns} FROM {_quote(kind)} WHERE department = ? ORDER BY rowid",
+                                         connection, params=(partition,))
+            return self._frame(kind, rows)
+        return self._cache.get_or_compute((kind, partition, version), load)
+
+    def write(self, kind, partition, df):
+        # Replaces the partition in one transaction; raises ValueError on missing columns, empty cells,
+        # malformed dates or any other row the database rejects
+        columns = _columns(kind)
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"{kind}: missing column(s) {', '.join(missing)}")
+        empty = [col for col in SCHEMAS[kind] if df[col].isna().any()]
+        if empty:
+            raise ValueError(f"{kind}: empty cell(s) in column(s) {', '.join(empty)}")
+        # SQLite would store text in a numeric column as text, so check the types here
+        non_numeric = [col for col in SCHEMAS[kind] if not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric:
+            raise ValueError(f"{kind}: non-numeric value(s) in column(s) {', '.join(non_numeric)}")
+        df = with_native_dates(df.reset_index(drop=True))
+        values = [df[col].tolist() for col in columns]
+        if "Date" in df.columns:
+            if df["Date"].isna().any():
+                raise ValueError(f"{kind}: missing dates")
+            values[0] = df["Date"].to_numpy("datetime64[ns]").astype(np.int64).tolist()
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        try:
+            with self._connection() as connection, connection:
+                connection.execute(f"DELETE FROM {_quote(kind)} WHERE department = ?", (partition,))
+                connection.executemany(
+                    f"INSERT INTO {_quote(kind)} (department, {', '.join(_quote(col) for col in columns)}) "
+                    f"VALUES ({placeholders})",
+                    zip([partition] * len(df), *values))
+                connection.execute(f"INSERT INTO {VERSIONS_TABLE} (kind, department, version) VALUES (?, ?, 1) "
+                                   "ON CONFLICT (kind, department) DO UPDATE SET version = version + 1",
+                                   (kind, partition))
+        except (sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+            # The transaction was rolled back; report the rows like any other invalid edit
+            raise ValueError(f"{kind}: {e}") from e
+
+    def sum_by_date(self, kind, partitions):
+        # Per-date sums of the value columns across the given departments, computed in SQL
+        partitions = list(partitions)
+        value_columns = list(SCHEMAS[kind])
+        sums = ", ".join(f"SUM({_quote(col)}) AS {_quote(col)}" for col in value_columns)
+        query = (f'SELECT "Date", {sums} FROM {_quote(kind)} '
+                 f"WHERE department IN ({', '.join('?' * len(partitions))}) "
+                 'GROUP BY "Date" ORDER BY "Date"')
+        with self._connection() as connection:
+            rows = pd.read_sql_query(query, connection, params=partitions)
+        return self._frame(kind, rows)
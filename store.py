@@ -0,0 +1,114 @@
+"""Persistent columnar data store backing the dashboard session state.
+
+Each chart type is one Parquet dataset, partitioned by department::
+
+    <root>/<kind>/department=<key>/data.parquet
+
+Reads are memory-mapped and cached per process keyed by file mtime/size, so
+all sessions share a single in-memory copy of every partition. Writes go to a
+temporary file in the partition directory and are moved into place with
+``os.replace``, so readers never observe a half-written file. The store root
+defaults to ``data/`` next to this file and can be changed with
+``DASHBOARD_DATA_DIR``; a value of ``sqlite:<path>`` selects the SQLite
+backend in ``sql_store`` instead.
+"""
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline import LRUCache, with_native_dates
+
+DEFAULT_STORE_PATH = Path(__file__).with_name("data")
+
+# Partition used for datasets that are not split by department (EAC, SPM)
+GLOBAL_PARTITION = "_overall"
+
+SQLITE_PREFIX = "sqlite:"
+
+
+def _to_storage(df):
+    # Dates are stored as native timestamps rather than DD.MM.YYYY strings
+    return with_native_dates(df.reset_index(drop=True))
+
+
+class ColumnarStore:
+    """Parquet dataset per chart type, one partition per department."""
+
+    def __init__(self, root, cache_size=512):
+        self.root = Path(root)
+        self._cache = LRUCache(maxsize=cache_size)
+        self._write_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        # Partition cache, exposed for hit/miss statistics
+        return self._cache
+
+    def _path(self, kind, partition):
+        return self.root / kind / f"department={partition}" / "data.parquet"
+
+    def partitions(self, kind):
+        kind_dir = self.root / kind
+        if not kind_dir.is_dir():
+            return []
+        return sorted(p.name.split("=", 1)[1] for p in kind_dir.glob("department=*")
+                      if (p / "data.parquet").is_file())
+
+    def read(self, kind, partition):
+        # Shared, read-only frame for the partition, or None if it has never been written
+        path = self._path(kind, partition)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return self._cache.get_or_compute(
+            (str(path), stat.st_mtime_ns, stat.st_size),
+            lambda: with_native_dates(pq.read_table(path, memory_map=True).to_pandas()))
+
+    def write(self, kind, partition, df):
+        # Raises ValueError if the frame cannot be converted (e.g. malformed dates)
+        table = pa.Table.from_pandas(_to_storage(df), preserve_index=False)
+        path = self._path(kind, partition)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock:
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".parquet.tmp")
+            os.close(fd)
+            try:
+                pq.write_table(table, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+def open_store(location):
+    # ColumnarStore for a directory, SQLiteStore for "sqlite:<path>"
+    location = str(location)
+    if location.startswith(SQLITE_PREFIX):
+        from sql_store import SQLiteStore
+        return SQLiteStore(location[len(SQLITE_PREFIX):])
+    return ColumnarStore(location)
+
+
+def store_exists(location):
+    location = str(location)
+    if location.startswith(SQLITE_PREFIX):
+        return Path(location[len(SQLITE_PREFIX):]).is_file()
+    return Path(location).is_dir()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    # Process-wide store shared by all sessions
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = open_store(os.environ.get("DASHBOARD_DATA_DIR", DEFAULT_STORE_PATH))
+        return _default_store
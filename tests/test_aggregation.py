@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import DateAggregate
+from pipeline import frame_fingerprint
+
+COLUMNS = ["Backlog", "In Progress", "Done"]
+
+
+def cfd(seed, dtype="int32"):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({"Date": pd.date_range("2025-01-02", periods=10)})
+    for col in COLUMNS:
+        frame[col] = rng.integers(0, 100, size=10).astype(dtype)
+    return frame
+
+
+def expected(frames):
+    grouped = pd.concat(frames, ignore_index=True).groupby("Date", as_index=False)[COLUMNS].sum()
+    return grouped.astype({col: frames[0][col].dtype for col in COLUMNS})
+
+
+def check(aggregate, frames):
+    for name, frame in frames.items():
+        aggregate.update(name, frame_fingerprint(frame), lambda frame=frame: frame)
+    pd.testing.assert_frame_equal(aggregate.frame(), expected(list(frames.values())), check_dtype=False)
+
+
+@pytest.mark.parametrize("dtype", ["int32", "float64"])
+def test_nan_edit_then_restore(dtype):
+    frames = {"Gov": cfd(1, dtype), "Risk": cfd(2, dtype)}
+    aggregate = DateAggregate(COLUMNS)
+    check(aggregate, frames)
+
+    edited = frames["Gov"].astype({"Backlog": "float64"})
+    edited.loc[3, "Backlog"] = 7
+    frames["Gov"] = edited
+    check(aggregate, frames)
+
+    blanked = edited.copy()
+    blanked.loc[3, "Backlog"] = np.nan
+    frames["Gov"] = blanked
+    check(aggregate, frames)
+    assert (aggregate.frame()["Backlog"] >= 0).all()
+
+    frames["Gov"] = cfd(1, dtype)
+    check(aggregate, frames)
+
+
+def test_missing_date_is_left_out():
+    frames = {"Gov": cfd(1), "Risk": cfd(2)}
+    aggregate = DateAggregate(COLUMNS)
+    check(aggregate, frames)
+
+    undated = frames["Gov"].copy()
+    undated.loc[4, "Date"] = pd.NaT
+    frames["Gov"] = undated
+    check(aggregate, frames)
+    assert aggregate.frame()["Date"].notna().all()
+
+    frames["Gov"] = cfd(1)
+    check(aggregate, frames)